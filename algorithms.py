@@ -2,13 +2,50 @@ import numpy as np
 from mat import mat
 from utils import in_half_plane, s_norm, Rz, angle, i2p
 import math as m
+from timeit import default_timer
+from diagnostics import Diagnostics, INFO
+
+
+# followWppDubins states, logged on every transition
+DUBINS_STATES = {
+    1: "Follow start orbit until on the correct side of H1",
+    2: "Continue following the start orbit until in H1",
+    3: "Transition to straight-line path until in H2",
+    4: "Follow the end orbit until on the correct side of H3",
+    5: "Continue following the end orbit until in H3",
+}
+
+# placeholder q and c followWppDubins returns for the path type it is not
+# flying, shared and read only so they are not allocated every tick
+Q_UNUSED = np.array([[1.0, 0.0, 0.0]]).T
+Q_UNUSED.flags.writeable = False
+C_UNUSED = np.zeros((3, 1))
+C_UNUSED.flags.writeable = False
+
+
+def batch_rows(x, n, shape):
+    """ returns x as float rows of the given shape for pathFollowerBatch, an
+    unused path member given as None becomes n rows of nan """
+    if x is None:
+        return np.full((n,) + shape, np.nan)
+    return np.asarray(x, dtype=float).reshape((-1,) + shape)
 
 
 class Algorithms:
-    def __init__(self):
-        print("WE HAVE INITIALIZED THE ALGY CLASS!!")
+    def __init__(self, diag=None):
+        self.diag = diag if diag is not None else Diagnostics()
+        if self.diag.debug_on:
+            self.diag.debug("init", 0, "WE HAVE INITIALIZED THE ALGY CLASS!!")
         self.i = 0
         self.state = 0
+        self.dubins_cache = DubinsCache()
+        self.mission = None
+        self.use_mission = False
+        # optional loop_stats.LatencyHistogram every Dubins segment lookup
+        # of followWppDubins is timed into
+        self.segment_timing = None
+        # half plane test of the path managers, swappable for comparisons
+        self.in_half_plane = in_half_plane
 
     def pathFollower(self, flag, r, q, p, chi, chi_inf, k_path, c, rho, lamb, k_orbit):
         """
@@ -88,6 +125,139 @@ class Algorithms:
 
         return e_crosstrack, chi_c, h_c
 
+    def pathFollowerFast(self, flag, r, q, p, chi, chi_inf, k_path, c, rho, lamb, k_orbit):
+        """
+        pathFollowerFast returns the same (e_crosstrack, chi_c, h_c) as
+        pathFollower without allocating any numpy arrays. Vectors are read
+        element by element with .item(), so any 3 element ndarray (3x1, 1x3,
+        flat, mat or a preallocated buffer) can be passed in. All outputs
+        are python floats.
+
+        Example Usage
+            e_crosstrack, chi_c, h_c = pathFollowerFast(flag, r, q, p, chi, ...)
+        """
+        if flag == 1:
+            return self.lineFollower(r.item(0), r.item(1), r.item(2), q.item(0), q.item(1), q.item(2),
+                                     p.item(0), p.item(1), chi, chi_inf, k_path)
+        elif flag == 2:
+            return self.orbitFollower(c.item(0), c.item(1), c.item(2), rho, lamb,
+                                      p.item(0), p.item(1), chi, k_orbit)
+        else:
+            raise Exception("Invalid path type")
+
+    def lineFollower(self, r_n, r_e, r_d, q_n, q_e, q_d, p_n, p_e, chi, chi_inf, k_path):
+        """
+        straight line follower (Algorithm 3) on plain floats, see pathFollower
+        """
+        chi_q = m.atan2(q_e, q_n)
+        if (chi_q - chi < -m.pi):
+            chi_q = chi_q + (2*m.pi)
+        if (chi_q - chi > m.pi):
+            chi_q = chi_q - (2*m.pi)
+
+        # n = q x k / |q x k| only has north and east components
+        e_n = p_n - r_n
+        e_e = p_e - r_e
+        q_ne = m.sqrt((q_n**2) + (q_e**2))
+        n_n = q_e / q_ne
+        n_e = -q_n / q_ne
+        e_dot_n = (e_n * n_n) + (e_e * n_e)
+        s_n = e_n - (e_dot_n * n_n)
+        s_e = e_e - (e_dot_n * n_e)
+        h_c = (-r_d) - (m.sqrt((s_n**2) + (s_e**2)) * (q_d / q_ne))
+
+        e_crosstrack = (-m.sin(chi_q) * e_n) + (m.cos(chi_q) * e_e)
+        chi_c = chi_q - (chi_inf * (2/m.pi) * m.atan(k_path * e_crosstrack))
+        return e_crosstrack, chi_c, h_c
+
+    def orbitFollower(self, c_n, c_e, c_d, rho, lamb, p_n, p_e, chi, k_orbit):
+        """
+        orbit follower (Algorithm 4) on plain floats, see pathFollower
+        """
+        d = m.sqrt(((p_n - c_n)**2) + ((p_e - c_e)**2))
+        phi = m.atan2((p_e - c_e), (p_n - c_n))
+        if (phi - chi < -m.pi):
+            phi = phi + (2*m.pi)
+        if (phi - chi > m.pi):
+            phi = phi - (2*m.pi)
+
+        e_crosstrack = d - rho
+        chi_c = phi + (lamb * ((m.pi/2) + m.atan(k_orbit * ((d - rho) / rho))))
+        return e_crosstrack, chi_c, -c_d
+
+    def pathFollowerBatch(self, flag, r, q, p, chi, chi_inf, k_path, c, rho, lamb, k_orbit):
+        """
+        pathFollowerBatch is a vectorized pathFollower, every row is an
+        independent position and path. Straight line and orbit rows can be
+        mixed, the unused path members of a row may be nan (or None).
+
+        Input:
+            flag = N flags, 1 for straight line, 2 for orbit
+            r = Nx3 origins of straight-line paths in NED (m)
+            q = Nx3 directions of straight-line paths in NED (m)
+            p = Nx3 positions of uav in NED (m)
+            chi = N course angles of UAV (rad)
+            chi_inf = straight line path following parameter, scalar or N
+            k_path = straight line path following parameter, scalar or N
+            c = Nx3 centers of orbits in NED (m)
+            rho = N radii of orbits (m)
+            lamb = N orbit directions, 1 clockwise, -1 counter-clockwise
+            k_orbit = orbit path following parameter, scalar or N
+
+        Outputs:
+            e_crosstrack = N crosstrack errors (m)
+            chi_c = N commanded course angles (rad)
+            h_c = N commanded altitudes (m)
+
+        Example Usage
+            e_crosstrack, chi_c, h_c = pathFollowerBatch(flag, r, q, p, chi, ...)
+        """
+
+        flag = np.asarray(flag).reshape(-1)
+        if not np.all((flag == 1) | (flag == 2)):
+            raise Exception("Invalid path type")
+        line = (flag == 1)
+        n = len(flag)
+        r = batch_rows(r, n, (3,))
+        q = batch_rows(q, n, (3,))
+        p = np.asarray(p, dtype=float).reshape(-1, 3)
+        c = batch_rows(c, n, (3,))
+        chi = np.asarray(chi, dtype=float).reshape(-1)
+        rho = batch_rows(rho, n, ())
+        lamb = batch_rows(lamb, n, ())
+        chi_inf = np.asarray(chi_inf, dtype=float)
+        k_path = np.asarray(k_path, dtype=float)
+        k_orbit = np.asarray(k_orbit, dtype=float)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # straight line, Algorithm 3
+            chi_q = np.arctan2(q[:,1], q[:,0])
+            chi_q = np.where(chi_q - chi < -np.pi, chi_q + (2*np.pi), chi_q)
+            chi_q = np.where(chi_q - chi > np.pi, chi_q - (2*np.pi), chi_q)
+            e_p_i = p - r
+            q_ne = np.hypot(q[:,0], q[:,1])
+            n_n = q[:,1] / q_ne   # n = q x k / |q x k|, n_d = 0
+            n_e = -q[:,0] / q_ne
+            e_n = (e_p_i[:,0] * n_n) + (e_p_i[:,1] * n_e)
+            s_ne = np.hypot(e_p_i[:,0] - (e_n * n_n), e_p_i[:,1] - (e_n * n_e))
+            h_line = (-r[:,2]) - (s_ne * (q[:,2] / q_ne))
+            e_line = (-np.sin(chi_q) * e_p_i[:,0]) + (np.cos(chi_q) * e_p_i[:,1])
+            chi_line = chi_q - (chi_inf * (2/np.pi) * np.arctan(k_path * e_line))
+
+            # orbit following, Algorithm 4
+            d = np.hypot(p[:,0] - c[:,0], p[:,1] - c[:,1])
+            phi = np.arctan2(p[:,1] - c[:,1], p[:,0] - c[:,0])
+            phi = np.where(phi - chi < -np.pi, phi + (2*np.pi), phi)
+            phi = np.where(phi - chi > np.pi, phi - (2*np.pi), phi)
+            e_orbit = d - rho
+            chi_orbit = phi + (lamb * ((np.pi/2) + np.arctan(k_orbit * ((d - rho) / rho))))
+
+        e_crosstrack = np.where(line, e_line, e_orbit)
+        chi_c = np.where(line, chi_line, chi_orbit)
+        h_c = np.where(line, h_line, -c[:,2])
+
+        return e_crosstrack, chi_c, h_c
+
     # followWpp algorithm left here for reference
     # It is not used in the final implementation
     def followWpp(self, w, p, newpath):
@@ -134,7 +304,7 @@ class Algorithms:
         ni = s_norm(qi1, qi)
 
         # Check if the MAV has crossed the half-plane
-        if in_half_plane(p, w[:, self.i], ni):
+        if self.in_half_plane(p, w[:, self.i], ni):
             if self.i < (N - 2):
                 self.i += 1
         q = qi1
@@ -200,7 +370,7 @@ class Algorithms:
             r = w[:, self.i - 1]
             q = q1
             z = w[:, self.i] - (R / (np.tan(e / 2))) * qi1
-            if in_half_plane(p, z, qi1):
+            if self.in_half_plane(p, z, qi1):
                 self.state = 2
 
         elif self.state == 2:
@@ -213,7 +383,7 @@ class Algorithms:
             lamb = np.sign(qi1(1) * qi(2) - qi1(2) * qi(1))
             z = w[:, self.i] + (R / (np.tan(e / 2))) * qi
 
-            if in_half_plane(p, z, qi):
+            if self.in_half_plane(p, z, qi):
                 if self.i < (N - 1):
                     self.i = self.i + 1
                 self.state = 1
@@ -296,33 +466,33 @@ class Algorithms:
         # Case 2: R-S-L
         th = self.anglem(c_le - c_rs)
         ell = np.linalg.norm(c_le - c_rs)
-        th2 = th - (np.pi/2) + m.asin((2*R)/ell)
-        ah = np.mod(th2,(2*np.pi))
-        ba = np.mod((chi_s-(np.pi/2)),(2*np.pi))
-        ca = np.mod(((2*np.pi)+ ah- ba),(2*np.pi))
-        da = np.mod((th2+np.pi),(2*np.pi))
-        eu = np.mod((chi_e+(np.pi/2)),(2*np.pi))
-        ef = np.mod(((2*np.pi)+ da- eu),(2*np.pi))
-        ja = np.sqrt((ell**2)-(4*(R**2)))
-        if (th2.imag != 0.0):
-            L2 = nan # Will not be selected
+        if ((2*R) > ell):
+            L2 = np.inf # Will not be selected
         else:
+            th2 = th - (np.pi/2) + m.asin((2*R)/ell)
+            ah = np.mod(th2,(2*np.pi))
+            ba = np.mod((chi_s-(np.pi/2)),(2*np.pi))
+            ca = np.mod(((2*np.pi)+ ah- ba),(2*np.pi))
+            da = np.mod((th2+np.pi),(2*np.pi))
+            eu = np.mod((chi_e+(np.pi/2)),(2*np.pi))
+            ef = np.mod(((2*np.pi)+ da- eu),(2*np.pi))
+            ja = np.sqrt((ell**2)-(4*(R**2)))
             L2 = ja + (R*ca) + (R*ef)
 
         # Case 3: L-S-R
         th = self.anglem(c_re - c_ls)
         ell = np.linalg.norm(c_re - c_ls)
-        th2 = m.acos((2*R)/ell)
-        ah = np.mod((chi_s+(np.pi/2)),(2*np.pi))
-        ba = np.mod((th+th2),(2*np.pi))
-        ca = np.mod(((2*np.pi)+ ah- ba),(2*np.pi))
-        da = np.mod((chi_e-(np.pi/2)),(2*np.pi))
-        eu = np.mod((th+th2-np.pi),(2*np.pi))
-        ef = np.mod(((2*np.pi)+ da- eu),(2*np.pi))
-        ja = np.sqrt((ell**2)-(4*(R**2)))
-        if (th2.imag != 0.0):
-            L3 = nan # Will not be selected
+        if ((2*R) > ell):
+            L3 = np.inf # Will not be selected
         else:
+            th2 = m.acos((2*R)/ell)
+            ah = np.mod((chi_s+(np.pi/2)),(2*np.pi))
+            ba = np.mod((th+th2),(2*np.pi))
+            ca = np.mod(((2*np.pi)+ ah- ba),(2*np.pi))
+            da = np.mod((chi_e-(np.pi/2)),(2*np.pi))
+            eu = np.mod((th+th2-np.pi),(2*np.pi))
+            ef = np.mod(((2*np.pi)+ da- eu),(2*np.pi))
+            ja = np.sqrt((ell**2)-(4*(R**2)))
             L3 = ja + (R*ca) + (R*ef)
 
         # Case 4: L-S-L
@@ -408,6 +578,169 @@ class Algorithms:
 
         return dp
 
+    def findDubinsParametersBatch(self, p_s, chi_s, p_e, chi_e, R):
+        """
+        findDubinsParametersBatch is a vectorized findDubinsParameters that
+        evaluates N start/end configurations in one call
+
+        Inputs:
+        p_s = Nx3 start positions (m)
+        chi_s = N start course angles (rad)
+        p_e = Nx3 end positions (m)
+        chi_e = N end course angles (rad)
+        R = turn radius (m)
+
+        Outputs
+        dp = DubinsParameters whose members are arrays with one row per
+             configuration, vectors are Nx3. dp.lengths is Nx4 and holds
+             np.inf for RSL/LSR paths that do not exist (centers closer than 2R)
+
+        Configurations closer than 3R are not rejected as they are by
+        findDubinsParameters, check them before calling if it matters.
+
+        Example Usage
+        dp = findDubinsParametersBatch( p_s, chi_s, p_e, chi_e, R )
+        """
+
+        p_s = np.asarray(p_s, dtype=float).reshape(-1, 3)
+        p_e = np.asarray(p_e, dtype=float).reshape(-1, 3)
+        chi_s = np.asarray(chi_s, dtype=float).reshape(-1)
+        chi_e = np.asarray(chi_e, dtype=float).reshape(-1)
+        N = p_s.shape[0]
+        pi = np.pi
+        tau = 2*np.pi
+        zero = np.zeros(N)
+
+        # Compute circle centers, R*Rz(+-pi/2)*[cos(chi), sin(chi), 0]
+        cs, ss = np.cos(chi_s), np.sin(chi_s)
+        ce, se = np.cos(chi_e), np.sin(chi_e)
+        c_rs = p_s + R*np.column_stack((-ss, cs, zero))
+        c_ls = p_s + R*np.column_stack((ss, -cs, zero))
+        c_re = p_e + R*np.column_stack((-se, ce, zero))
+        c_le = p_e + R*np.column_stack((se, -ce, zero))
+
+        # Compute path lengths
+        # Case 1: R-S-R
+        d = c_re - c_rs
+        th1 = np.arctan2(d[:,1], d[:,0])
+        ell1 = np.linalg.norm(d, axis=1)
+        L1 = ell1 + R*np.mod(tau + np.mod(th1 - pi/2, tau) - np.mod(chi_s - pi/2, tau), tau) \
+            + R*np.mod(tau + np.mod(chi_e - pi/2, tau) - np.mod(th1 - pi/2, tau), tau)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Case 2: R-S-L
+            d = c_le - c_rs
+            th2 = np.arctan2(d[:,1], d[:,0])
+            ell2 = np.linalg.norm(d, axis=1)
+            a2 = th2 - pi/2 + np.arcsin((2*R)/ell2)
+            L2 = np.sqrt(ell2**2 - 4*R**2) + R*np.mod(tau + np.mod(a2, tau) - np.mod(chi_s - pi/2, tau), tau) \
+                + R*np.mod(tau + np.mod(a2 + pi, tau) - np.mod(chi_e + pi/2, tau), tau)
+            L2 = np.where((2*R) > ell2, np.inf, L2)
+
+            # Case 3: L-S-R
+            d = c_re - c_ls
+            th3 = np.arctan2(d[:,1], d[:,0])
+            ell3 = np.linalg.norm(d, axis=1)
+            a3 = th3 + np.arccos((2*R)/ell3)
+            L3 = np.sqrt(ell3**2 - 4*R**2) + R*np.mod(tau + np.mod(chi_s + pi/2, tau) - np.mod(a3, tau), tau) \
+                + R*np.mod(tau + np.mod(chi_e - pi/2, tau) - np.mod(a3 - pi, tau), tau)
+            L3 = np.where((2*R) > ell3, np.inf, L3)
+
+        # Case 4: L-S-L
+        d = c_le - c_ls
+        th4 = np.arctan2(d[:,1], d[:,0])
+        ell4 = np.linalg.norm(d, axis=1)
+        L4 = ell4 + R*np.mod(tau + np.mod(chi_s + pi/2, tau) - np.mod(th4 + pi/2, tau), tau) \
+            + R*np.mod(tau + np.mod(th4 + pi/2, tau) - np.mod(chi_e + pi/2, tau), tau)
+
+        # Define the parameters for the minimum length path (i.e. Dubins path)
+        lengths = np.column_stack((L1, L2, L3, L4))
+        case = np.argmin(lengths, axis=1)
+        rows = np.arange(N)
+
+        # Candidate half planes for every case, stacked 4xNx3 and picked by case
+        q_rsr = (c_re - c_rs) / ell1[:,None]
+        q_lsl = (c_le - c_ls) / ell4[:,None]
+        q_1 = np.stack((
+            q_rsr,
+            np.column_stack((np.cos(a2 + pi/2), np.sin(a2 + pi/2), zero)),
+            np.column_stack((np.cos(a3 - pi/2), np.sin(a3 - pi/2), zero)),
+            q_lsl))[case, rows]
+        z_1 = np.stack((
+            c_rs + R*np.column_stack((q_rsr[:,1], -q_rsr[:,0], q_rsr[:,2])),
+            c_rs + R*np.column_stack((np.cos(a2), np.sin(a2), zero)),
+            c_ls + R*np.column_stack((np.cos(a3), np.sin(a3), zero)),
+            c_ls + R*np.column_stack((-q_lsl[:,1], q_lsl[:,0], q_lsl[:,2]))))[case, rows]
+        z_2 = np.stack((
+            c_re + R*np.column_stack((q_rsr[:,1], -q_rsr[:,0], q_rsr[:,2])),
+            c_le + R*np.column_stack((np.cos(a2 + pi), np.sin(a2 + pi), zero)),
+            c_re + R*np.column_stack((np.cos(a3 - pi), np.sin(a3 - pi), zero)),
+            c_le + R*np.column_stack((-q_lsl[:,1], q_lsl[:,0], q_lsl[:,2]))))[case, rows]
+
+        # package output into DubinsParameters class
+        dp = DubinsParameters()
+        dp.L = lengths[rows, case]
+        dp.c_s = np.where((case < 2)[:,None], c_rs, c_ls)
+        dp.lamb_s = np.where(case < 2, 1, -1)
+        dp.c_e = np.where((case % 2 == 0)[:,None], c_re, c_le)
+        dp.lamb_e = np.where(case % 2 == 0, 1, -1)
+        dp.z_1 = z_1
+        dp.q_1 = q_1
+        dp.z_2 = z_2
+        dp.z_3 = p_e.copy()
+        dp.q_3 = np.column_stack((ce, se, zero))
+        dp.case = case
+        dp.lengths = lengths
+        dp.theta = np.stack((th4, th2, th3, th4))[case, rows]
+        dp.ell = np.stack((ell1, ell2, ell3, ell4))[case, rows]
+        dp.c_rs = c_rs
+        dp.c_ls = c_ls
+        dp.c_re = c_re
+        dp.c_le = c_le
+
+        return dp
+
+    def compileMission(self, W, Chi, R):
+        """
+        compileMission runs findDubinsParametersBatch over every pair of
+        consecutive waypoints and stores the results in a CompiledMission
+        that followWppDubins looks segments up from.
+
+        Inputs:
+            W = 3xn matrix of waypoints in NED (m)
+            Chi = list of course angles at waypoints in NED (rad)
+            R = fillet radius (m)
+
+        Outputs
+            mission = CompiledMission with n-1 segments
+
+        Example Usage
+            mission = compileMission(W, Chi, R)
+        """
+        (m,N) = W.shape
+        assert (N >= 3), "Not enough vehicle configurations."
+        assert (m == 3)
+        mission = CompiledMission(W, Chi, R)
+        self.compileSegments(mission, np.arange(N-1))
+        self.mission = mission
+        return mission
+
+    def compileSegments(self, mission, segments):
+        """
+        compileSegments (re)computes the given rows of a CompiledMission from
+        its waypoints and course angles, e.g. the first segment once the
+        start position is known
+
+        Inputs:
+            mission = CompiledMission
+            segments = row indices to compute
+        """
+        k = np.asarray(segments, dtype=int)
+        w = mission.W.T
+        chi = mission.Chi
+        assert np.all(np.linalg.norm(w[k,0:2] - w[k+1,0:2], axis=1) >= 3*mission.R), "Start and end configurations are too close!"
+        mission.fill(self.findDubinsParametersBatch(w[k], chi[k], w[k+1], chi[k+1], mission.R), k)
+
     def min_i(self,Ls):
         i = 0
         val = Ls[0]
@@ -460,41 +793,34 @@ class Algorithms:
         """
 
         # TODO Algorithm 8 goes here
-        
-        try:
-            self.i
-        except NameError:
-            print("THIS VAR IS NOT YET DEFINED!")
-            self.i = 0
-        else:
-            print("YEUP, IT'S ALREADY DEFINED")
-        try:
-            self.state 
-        except NameError:
-            print("STATE: THIS VAR IS NOT YET DEFINED!")
-            self.state = 0
-        else:
-            print("STATE: YEP, ALREADY BEUNO.")
-        
-        print("\nNEWPATH IS: ",newpath)
         if newpath:
-            print("\nARE we GETting in here???")
+            if self.diag.info_on:
+                self.diag.info("newpath", 0, "New path: {0} waypoints", W.shape[1])
+            self.dubins_cache.clear()
             self.i = 1   # This value has been decreased from 2 for MATLAB->Python indexing
             self.state = 1   # This value has been kept the same
             (m,N) = W.shape
             assert (N >= 3), "Not enough vehicle configurations."
             assert (m == 3)
+            self.use_mission = self.mission is not None and self.mission.matches(W, Chi, R)
         else:
-            print("\nARe we getting into this else statement?")
             (m,N) = W.shape
             assert (N >= 3), "Not enough vehicle configurations."
             assert (m == 3)
         # Determine the Dubins path parameters
-        ps = W[:,self.i-1]
-        chis = Chi[self.i-1]
-        pe = W[:,self.i]
-        chie = Chi[self.i]
-        dp = self.findDubinsParameters( ps, chis, pe, chie, R )
+        if self.segment_timing is not None:
+            t0 = default_timer()
+        if self.use_mission:
+            # precompiled mission, look up the row for this segment
+            dp = self.mission.segment(self.i-1)
+        else:
+            ps = W[:,self.i-1]
+            chis = Chi[self.i-1]
+            pe = W[:,self.i]
+            chie = Chi[self.i]
+            dp = self.dubins_cache.get(self, self.i, ps, chis, pe, chie, R)
+        if self.segment_timing is not None:
+            self.segment_timing.record(default_timer() - t0)
         # L = dp.L
         c_s = dp.c_s
         lamb_s = dp.lamb_s
@@ -507,65 +833,216 @@ class Algorithms:
         q_3 = dp.q_3
         if (self.state == 1):
             #Follow start orbit until on the correct side of H1
-            print("\nSTATE: 1; Follow start orbit until on the correct side of H1")
             flag = 2
             c = c_s
             rho = R
             lamb = lamb_s
-            if in_half_plane(p,z_1,-q_1):
+            if self.in_half_plane(p,z_1,-q_1):
                 self.state = 2
             r = p
-            q = np.array([[1, 0, 0]]).T
+            q = Q_UNUSED
         elif (self.state == 2):
             #Continue following the start orbit until in H1
-            print("\nSTATE: 2; Continue following the start orbit until in H1")
-            if in_half_plane(p,z_1,q_1):
+            if self.in_half_plane(p,z_1,q_1):
                 self.state = 3
             flag = 2
             r = p
-            q = np.array([[1, 0, 0]]).T
+            q = Q_UNUSED
             c = c_s
             rho = R
             lamb = lamb_s
         elif (self.state == 3):
             #Transition to straight-line path until in H2
-            print("\nSTATE: 3; Transition to straight-line path until in H2")
             flag = 1
             r = z_1
             q = q_1
-            if in_half_plane(p,z_2,q_1):
+            if self.in_half_plane(p,z_2,q_1):
                 self.state = 4
-            c = np.zeros((3,1))
+            c = C_UNUSED
             rho = 0
             lamb = 0
         elif (self.state == 4):
             #Follow the end orbit until on the correct side of H3
-            print("\nSTATE: 4; Follow the end orbit until on the correct side of H3")
             flag = 2
             c = c_e
             rho = R
             lamb = lamb_e
-            if in_half_plane(p,z_3,-q_3):
+            if self.in_half_plane(p,z_3,-q_3):
                 self.state = 5
             r = p
-            q = np.array([[1, 0, 0]]).T
+            q = Q_UNUSED
         else: #state == 5
             #Continue following the end orbit until in H3
-            print("\nSTATE: 5; Continue following the end orbit until in H3")
             flag = 2
             r = p
-            q = np.array([[1, 0, 0]]).T
+            q = Q_UNUSED
             c = c_e
             rho = R
             lamb = lamb_e
-            if in_half_plane(p,z_3,q_3):
+            if self.in_half_plane(p,z_3,q_3):
                 self.state = 1
                 if (self.i < N):
                     self.i = (self.i+1)
 
+        if self.diag.info_on:
+            self.diag.transition(INFO, "dubins_state", (self.i, self.state), "Waypoint {0}, STATE: {1}; {2}",
+                                 self.i, self.state, DUBINS_STATES[self.state])
+
         return flag, r, q, c, rho, lamb, self.i, dp
 
 
+class DubinsCache:
+    def __init__(self):
+        """
+        DubinsCache memoizes findDubinsParameters for followWppDubins. The
+        Dubins path only changes when the waypoint index moves on, so each
+        segment is computed once and looked up on every other pass.
+
+        Member Variables:
+            entries = dict of DubinsParameters keyed on (i, R, p_s, chi_s, p_e, chi_e)
+            hits = number of lookups answered from the cache
+            misses = number of lookups that called findDubinsParameters
+        """
+
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, alg, i, p_s, chi_s, p_e, chi_e, R):
+        """
+        returns the DubinsParameters for segment i, computing them with
+        alg.findDubinsParameters on the first request
+        """
+        key = (i, R) + tuple(np.ravel(p_s).tolist()) + tuple(np.ravel(p_e).tolist()) + \
+            (float(np.ravel(chi_s)[0]), float(np.ravel(chi_e)[0]))
+        dp = self.entries.get(key)
+        if dp is None:
+            self.misses += 1
+            dp = alg.findDubinsParameters(p_s, chi_s, p_e, chi_e, R)
+            self.entries[key] = dp
+        else:
+            self.hits += 1
+        return dp
+
+    def clear(self):
+        """ drops every cached segment, used when a new path is loaded """
+        self.entries.clear()
+
+    def stats(self):
+        """ returns a one line summary of the cache hit/miss counts """
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return "Dubins cache: {0} hits, {1} misses ({2:.1f}% hit rate), {3} segments".format(
+            self.hits, self.misses, rate, len(self.entries))
+
+
+class CompiledMission:
+    # 3x1 members of DubinsParameters, stored as (n, 3, 1) arrays
+    VECTORS = ("c_s", "c_e", "z_1", "q_1", "z_2", "z_3", "q_3", "c_rs", "c_ls", "c_re", "c_le")
+    # per segment arrays
+    ARRAYS = ("L", "lengths", "case", "lamb_s", "lamb_e", "theta", "ell")
+
+    def __init__(self, W, Chi, R):
+        """
+        CompiledMission is an array backed table of the Dubins path between
+        every pair of consecutive waypoints. Row k holds the segment from
+        waypoint k to waypoint k+1, vectors are stored as 3x1 columns so a row
+        can be used anywhere a DubinsParameters member is expected.
+
+        Member Variables:
+            W = copy of the waypoints the mission was compiled from
+            Chi = copy of the course angles the mission was compiled from
+            R = fillet radius (m)
+            L = path length of every segment (m)
+            lengths = RSR, RSL, LSR, LSL lengths of every segment (m)
+            case = chosen case of every segment (unitless)
+            c_s, c_e = start and end circle origins (m)
+            lamb_s, lamb_e = start and end circle directions (unitless)
+            z_1, z_2, z_3 = Half-plane H_1, H_2 and H_3 locations (m)
+            q_1, q_3 = Half-plane unit normals (unitless)
+        """
+
+        n = W.shape[1] - 1
+        self.W = np.array(W, dtype=float)
+        self.Chi = np.array(Chi, dtype=float).reshape(-1)
+        self.R = R
+        self.L = np.zeros(n)
+        self.lengths = np.zeros((n, 4))
+        self.case = np.zeros(n, dtype=int)
+        self.lamb_s = np.zeros(n, dtype=int)
+        self.lamb_e = np.zeros(n, dtype=int)
+        self.theta = np.zeros(n)
+        self.ell = np.zeros(n)
+        for name in self.VECTORS:
+            setattr(self, name, np.zeros((n, 3, 1)))
+        self.dp = [None] * n
+
+    def __len__(self):
+        return len(self.L)
+
+    def fill(self, dp, rows=slice(None)):
+        """ copies the output of findDubinsParametersBatch into the given rows of the table """
+        self.L[rows] = dp.L
+        self.lengths[rows] = dp.lengths
+        self.case[rows] = dp.case
+        self.lamb_s[rows] = dp.lamb_s
+        self.lamb_e[rows] = dp.lamb_e
+        self.theta[rows] = dp.theta
+        self.ell[rows] = dp.ell
+        for name in self.VECTORS:
+            getattr(self, name)[rows,:,0] = getattr(dp, name)
+        self.dp = [None] * len(self)
+
+    def segment(self, k):
+        """ returns row k as a DubinsParameters whose vectors are views into the table """
+        dp = self.dp[k]
+        if dp is None:
+            dp = DubinsParameters()
+            dp.L = float(self.L[k])
+            dp.lengths = self.lengths[k].tolist()
+            dp.case = int(self.case[k])
+            dp.lamb_s = int(self.lamb_s[k])
+            dp.lamb_e = int(self.lamb_e[k])
+            dp.theta = float(self.theta[k])
+            dp.ell = float(self.ell[k])
+            for name in self.VECTORS:
+                setattr(dp, name, getattr(self, name)[k])
+            self.dp[k] = dp
+        return dp
+
+    def arrays(self):
+        """ returns the table as a dict of arrays, see from_arrays """
+        d = dict((name, getattr(self, name)) for name in self.ARRAYS + self.VECTORS)
+        d['W'] = self.W
+        d['Chi'] = self.Chi
+        d['R'] = np.array(self.R, dtype=float)
+        return d
+
+    @classmethod
+    def from_arrays(cls, d):
+        """ rebuilds a CompiledMission from the output of arrays(), e.g. a loaded .npz """
+        mission = cls(d['W'], d['Chi'], float(d['R']))
+        for name in cls.ARRAYS + cls.VECTORS:
+            getattr(mission, name)[...] = d[name]
+        return mission
+
+    def matches(self, W, Chi, R):
+        """ checks that the mission was compiled from these waypoints """
+        return (self.R == R and self.W.shape == np.shape(W) and np.array_equal(self.W, W)
+                and np.array_equal(self.Chi, np.ravel(Chi)))
+
+    def total_length(self):
+        """ returns the length of the whole mission (m) """
+        return float(np.sum(self.L))
+
+    def summary(self):
+        """ returns a printable summary of the segment and mission lengths """
+        lines = ["Mission: {0} segments, total length {1:.1f} m".format(len(self), self.total_length())]
+        for k in range(len(self)):
+            lines.append("  segment {0}: case {1}, L = {2:.1f} m".format(k + 1, self.case[k], self.L[k]))
+        return "\n".join(lines)
+
+
 class DubinsParameters:
     def __init__(self):
         """
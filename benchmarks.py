@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+"""
+Microbenchmark suite of the guidance code on the inputs of
+missions/path_manager_large.plan, along with the path follower cases of
+path_follower_test and the mat guidance tick the loop used to run on, kept
+as baselines for the allocation free and plain ndarray versions. Every
+benchmark is timed in rounds of
+enough calls to take min_time, and the per call statistics are saved as JSON
+so a run can be compared against one from another commit
+
+    python benchmarks.py -o before.json
+    python benchmarks.py -o after.json --compare before.json
+    python benchmarks.py -k dubins
+
+The JSON layout follows pytest-benchmark (machine_info, commit_info and a
+benchmarks list with stats in seconds per call).
+"""
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from timeit import default_timer
+import numpy as np
+from mat import mat
+from algorithms import Algorithms
+from diagnostics import Diagnostics, OFF
+from kinematic_sim import fly_mission
+from plan import read_plan, calc_chi_waypoint
+from utils import format_chi, in_half_plane, Rz, s_norm
+
+BENCH_PLAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "missions", "path_manager_large.plan")
+DUBINS_CASES = ("RSR", "RSL", "LSR", "LSL")
+
+
+def make_follower_cases():
+    """ the straight line and orbit cases from path_follower_test """
+    line = (1, np.array([[-1000, 0, -500]]).T, np.array([[0.7044, 0.7044, 0.0872]]).T,
+            np.array([[0, 0, -500]]).T, 3.2687e-18, 1.5708, 0.02, np.zeros((3, 1)), 0, 0, 0)
+    orbit = (2, np.zeros((3, 1)), np.array([[1, 0, 0]]).T, np.array([[0.875, 0, 0]]).T,
+             0.0, 1.5708, 0.02, np.array([[0, 1000, -600]]).T, 200, 1, 3)
+    return [("straight line", line), ("orbit", orbit)]
+
+
+def in_half_plane_mat(p, r, n):
+    """ the half plane test as it was written for mat, (p - r).T * n is a matmul """
+    if ((p - r).T * n) >= 0:
+        return 1
+    else:
+        return 0
+
+
+def tick(alg, W, Chi, p):
+    """ the path manager and path follower part of UAV.guidance_cycle """
+    flag, r, q, c, rho, lamb, i, dp = alg.followWppDubins(W, Chi, p, 50, 0)
+    e_crosstrack, chi_c, h_c = alg.pathFollowerFast(flag, r, q, p, 0.1, np.pi / 2, 0.0125, c, rho, lamb, 3.5)
+    return format_chi(chi_c)
+
+
+def make_tick_alg(half_plane=in_half_plane):
+    """ a path manager part way along a square mission, half_plane is the
+    half plane test it switches states with """
+    W = mat([[0, 500, 500, 0], [0, 0, 500, 500], [-50, -50, -50, -50]])
+    Chi = calc_chi_waypoint(W, mat([-100, 0, 0]).T)
+    alg = Algorithms(Diagnostics(OFF))
+    alg.in_half_plane = half_plane
+    alg.compileMission(W, Chi, 50)
+    alg.followWppDubins(W, Chi, mat([5.0, 10.0, -50.0]).T, 50, 1)
+    return alg, W, Chi
+
+
+class StateMsg:
+    def __init__(self):
+        """ state message position, ENU """
+        self.x = 10.0
+        self.y = 5.0
+        self.z = 50.0
+
+
+class MissionReplay:
+    def __init__(self, alg, W, Chi, positions, R):
+        """
+        MissionReplay steps followWppDubins through the positions of a flown
+        mission, one position per call, so the benchmark goes through the
+        state machine and waypoint switches the way the guidance loop does.
+        The mission starts over when the positions run out.
+
+        Member Variables:
+            positions = list of 3x1 positions in NED (m)
+            k = index of the next position
+        """
+
+        self.alg = alg
+        self.W = W
+        self.Chi = Chi
+        self.positions = positions
+        self.R = R
+        self.k = 0
+
+    def step(self):
+        k = self.k
+        newpath = 1 if k == 0 else 0
+        self.k = k + 1 if k + 1 < len(self.positions) else 0
+        return self.alg.followWppDubins(self.W, self.Chi, self.positions[k], self.R, newpath)
+
+
+def dubins_case_args(W, Chi, R):
+    """ returns the (p_s, chi_s, p_e, chi_e, R) of the first segment of W
+    flown with each Dubins case, keyed by case """
+    alg = Algorithms(Diagnostics(OFF))
+    args = {}
+    for k in range(W.shape[1] - 1):
+        segment = (W[:, k:k + 1], float(np.ravel(Chi)[k]), W[:, k + 1:k + 2], float(np.ravel(Chi)[k + 1]), R)
+        args.setdefault(alg.findDubinsParameters(*segment).case, segment)
+    return args
+
+
+def make_benchmarks(plan_file=BENCH_PLAN, R=50, t_flown=60.0):
+    """ returns (group, name, function, args) of every benchmark """
+    W = read_plan(plan_file)
+    home = np.zeros((3, 1))
+    Chi = calc_chi_waypoint(W, home)
+    alg = Algorithms(Diagnostics(OFF))
+
+    benchmarks = []
+    for name, args in make_follower_cases():
+        flag = "flag {0} {1}".format(args[0], name)
+        benchmarks.append(("pathFollower", "pathFollower " + flag, alg.pathFollower, args))
+        benchmarks.append(("pathFollower", "pathFollowerFast " + flag, alg.pathFollowerFast, args))
+
+    for case, args in sorted(dubins_case_args(W, Chi, R).items()):
+        benchmarks.append(("dubins", "findDubinsParameters " + DUBINS_CASES[case], alg.findDubinsParameters, args))
+
+    # the compiled mission the node flies, and the DubinsCache fallback
+    flown = fly_mission(W, Chi, R=R, t_max=t_flown)
+    positions = [p.reshape(3, 1).copy() for p in flown.p]
+    compiled = Algorithms(Diagnostics(OFF))
+    compiled.compileMission(W, Chi, R)
+    replay = MissionReplay(compiled, W, Chi, positions, R)
+    benchmarks.append(("dubins", "followWppDubins step", replay.step, ()))
+    replay = MissionReplay(Algorithms(Diagnostics(OFF)), W, Chi, positions, R)
+    benchmarks.append(("dubins", "followWppDubins step uncompiled", replay.step, ()))
+
+    p = np.array([[5.0], [10.0], [-50.0]])
+    z = np.array([[0.0], [50.0], [-50.0]])
+    q = np.array([[1.0], [0.0], [0.0]])
+    benchmarks.append(("utils", "in_half_plane", in_half_plane, (p, z, q)))
+    benchmarks.append(("utils", "in_half_plane mat matmul", in_half_plane_mat, (mat(p), mat(z), mat(q))))
+    benchmarks.append(("utils", "Rz", Rz, (0.3,)))
+    benchmarks.append(("utils", "s_norm", s_norm, (q, np.array([[0.0], [1.0], [0.0]]))))
+
+    benchmarks.append(("plan", "calc_chi_waypoint", calc_chi_waypoint, (W, home)))
+    benchmarks.append(("plan", "read_plan", read_plan, (plan_file,)))
+
+    # one guidance tick and the state callback conversion, on plain 3x1
+    # ndarrays against the mat the loop used to run on
+    msg = StateMsg()
+    tick_alg, tick_W, tick_Chi = make_tick_alg()
+    mat_alg, mat_W, mat_Chi = make_tick_alg(in_half_plane_mat)
+    benchmarks.append(("guidance", "state callback ndarray",
+                       lambda: np.array([[msg.y], [msg.x], [-msg.z]]), ()))
+    benchmarks.append(("guidance", "state callback mat", lambda: mat([msg.y, msg.x, -msg.z]).T, ()))
+    benchmarks.append(("guidance", "guidance tick ndarray", tick, (tick_alg, tick_W, tick_Chi, p)))
+    benchmarks.append(("guidance", "guidance tick mat", tick, (mat_alg, mat_W, mat_Chi, mat(p))))
+    return benchmarks
+
+
+def time_rounds(func, args, rounds=5, min_time=0.05):
+    """ returns the iterations per round and the seconds per call of every
+    round, iterations are doubled until a round takes min_time """
+    number = 1
+    while True:
+        start = default_timer()
+        for _ in range(number):
+            func(*args)
+        elapsed = default_timer() - start
+        if elapsed >= min_time or number >= 1 << 24:
+            break
+        number *= 2
+
+    times = [elapsed / number]
+    for _ in range(rounds - 1):
+        start = default_timer()
+        for _ in range(number):
+            func(*args)
+        times.append((default_timer() - start) / number)
+    return number, times
+
+
+def stats(times):
+    t = np.array(times)
+    return {"min": float(t.min()), "max": float(t.max()), "mean": float(t.mean()), "stddev": float(t.std()),
+            "median": float(np.median(t)), "rounds": len(t)}
+
+
+def machine_info():
+    return {"node": platform.node(), "machine": platform.machine(), "system": platform.system(),
+            "python_version": platform.python_version(), "numpy_version": np.__version__}
+
+
+def commit_info():
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        with open(os.devnull, 'w') as devnull:
+            commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=directory, stderr=devnull)
+            dirty = subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"],
+                                            cwd=directory, stderr=devnull)
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    return {"id": commit.decode().strip(), "dirty": bool(dirty.strip())}
+
+
+def run_benchmarks(benchmarks, rounds=5, min_time=0.05, select=None):
+    """ times every benchmark whose name contains select and returns the
+    results in the JSON layout """
+    results = []
+    for group, name, func, args in benchmarks:
+        if select is not None and select.lower() not in name.lower():
+            continue
+        number, times = time_rounds(func, args, rounds, min_time)
+        results.append({"group": group, "name": name, "iterations": number, "stats": stats(times)})
+    return {"machine_info": machine_info(), "commit_info": commit_info(),
+            "datetime": datetime.datetime.utcnow().isoformat(), "benchmarks": results}
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compare(baseline, results, threshold=1.1):
+    """ returns the (name, baseline s, current s, ratio) of every benchmark
+    in both runs, by best round, and the names that got slower than
+    threshold times the baseline """
+    before = dict((b["name"], b["stats"]["min"]) for b in baseline["benchmarks"])
+    rows = []
+    regressions = []
+    for b in results["benchmarks"]:
+        if b["name"] not in before:
+            continue
+        ratio = b["stats"]["min"] / before[b["name"]]
+        rows.append((b["name"], before[b["name"]], b["stats"]["min"], ratio))
+        if ratio > threshold:
+            regressions.append(b["name"])
+    return rows, regressions
+
+
+def report(results):
+    lines = ["{0:<42} {1:>11} {2:>11} {3:>11} {4:>10}".format("benchmark", "min (us)", "median (us)",
+                                                                "stddev (us)", "iterations")]
+    for b in results["benchmarks"]:
+        s = b["stats"]
+        lines.append("{0:<42} {1:11.2f} {2:11.2f} {3:11.2f} {4:10d}".format(
+            b["name"], 1e6 * s["min"], 1e6 * s["median"], 1e6 * s["stddev"], b["iterations"]))
+    return "\n".join(lines)
+
+
+def compare_report(rows):
+    lines = ["{0:<42} {1:>11} {2:>11} {3:>8}".format("benchmark", "base (us)", "now (us)", "ratio")]
+    for name, before, after, ratio in rows:
+        lines.append("{0:<42} {1:11.2f} {2:11.2f} {3:7.2f}x".format(name, 1e6 * before, 1e6 * after, ratio))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the guidance code")
+    parser.add_argument('-o', '--output', help="save the results to this JSON file")
+    parser.add_argument('-k', dest='select', help="only run benchmarks whose name contains this")
+    parser.add_argument('--compare', help="JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help="slowdown ratio that counts as a regression with --compare")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05, help="minimum seconds per round")
+    parser.add_argument('--plan', default=BENCH_PLAN)
+    args = parser.parse_args()
+
+    results = run_benchmarks(make_benchmarks(args.plan), args.rounds, args.min_time, args.select)
+    print(report(results))
+    if args.output:
+        save_results(results, args.output)
+
+    if args.compare:
+        rows, regressions = compare(load_results(args.compare), results, args.threshold)
+        print()
+        print(compare_report(rows))
+        if regressions:
+            print("Slower than {0:.2f}x the baseline: {1}".format(args.threshold, ", ".join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
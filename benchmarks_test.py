@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import benchmarks
+from plan import read_plan, calc_chi_waypoint
+from mat import mat
+
+
+class benchmarks_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_largePlanCoversEveryDubinsCase(self):
+        W = read_plan(benchmarks.BENCH_PLAN)
+        Chi = calc_chi_waypoint(W, mat([0, 0, 0]).T)
+        self.assertEqual(sorted(benchmarks.dubins_case_args(W, Chi, 50)), [0, 1, 2, 3])
+
+    def test_resultsRoundTripAndCompare(self):
+        suite = benchmarks.make_benchmarks(t_flown=5.0)
+        names = [name for group, name, func, args in suite]
+        self.assertEqual(len(names), len(set(names)))
+
+        results = benchmarks.run_benchmarks(suite, rounds=2, min_time=1e-4)
+        self.assertEqual(len(results["benchmarks"]), len(suite))
+        for b in results["benchmarks"]:
+            self.assertEqual(b["stats"]["rounds"], 2)
+            self.assertGreater(b["stats"]["min"], 0)
+
+        path = os.path.join(self.directory, "results.json")
+        benchmarks.save_results(results, path)
+        baseline = benchmarks.load_results(path)
+        self.assertEqual(baseline["benchmarks"], json.loads(json.dumps(results["benchmarks"])))
+
+        rows, regressions = benchmarks.compare(baseline, results)
+        self.assertEqual(len(rows), len(suite))
+        self.assertEqual(regressions, [])
+        for b in baseline["benchmarks"]:
+            b["stats"]["min"] *= 0.5
+        rows, regressions = benchmarks.compare(baseline, results)
+        self.assertEqual(regressions, names)
+
+    def test_select(self):
+        results = benchmarks.run_benchmarks(benchmarks.make_benchmarks(t_flown=5.0), rounds=1, min_time=1e-4,
+                                            select="dubinsparameters")
+        self.assertEqual([b["name"] for b in results["benchmarks"]],
+                         ["findDubinsParameters " + case for case in benchmarks.DUBINS_CASES])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+class RosClock:
+    def __init__(self):
+        """
+        RosClock is the default clock for UAV and MavrosTestCommon, a thin
+        wrapper around rospy time so a SimClock can be dropped in instead
+        """
+        import rospy
+        self.rospy = rospy
+        self.lockstep = False
+
+    def now(self):
+        """ returns the current time (s) """
+        return self.rospy.get_time()
+
+    def rate(self, hz):
+        """ returns an object whose sleep() keeps a loop at hz """
+        return self.rospy.Rate(hz)
+
+    def sleep(self, duration):
+        self.rospy.sleep(duration)
+
+    def is_shutdown(self):
+        return self.rospy.is_shutdown()
+
+
+class SimClock:
+    def __init__(self, t0=0.0, dt=0.01):
+        """
+        SimClock is a simulated clock for lockstep SIL runs. Time only moves
+        when the (single) thread running the node sleeps on it, and every
+        dt of simulated time the step callbacks run, which is where a
+        stand-in simulator advances the vehicle and delivers state messages.
+        A mission therefore runs as fast as the guidance can be computed and
+        the same inputs always give the same commands.
+
+        Member Variables:
+            t = simulated time (s)
+            dt = step callback period (s)
+            callbacks = functions called as f(t, dt) every step
+            shutdown = set by request_shutdown() to end the node loops
+        """
+
+        self.t = t0
+        self.dt = dt
+        self.callbacks = []
+        self.shutdown = False
+        self.lockstep = True
+
+    def now(self):
+        return self.t
+
+    def rate(self, hz):
+        return SimRate(self, hz)
+
+    def sleep(self, duration):
+        """ advances simulated time by duration, running the step callbacks on the way """
+        end = self.t + duration
+        while self.t + self.dt <= end + 1e-9 and not self.shutdown:
+            for callback in self.callbacks:
+                callback(self.t, self.dt)
+            self.t += self.dt
+        if not self.shutdown:
+            self.t = max(self.t, end)
+
+    def add_step_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def request_shutdown(self):
+        self.shutdown = True
+
+    def is_shutdown(self):
+        return self.shutdown
+
+
+class SimRate:
+    def __init__(self, clock, hz):
+        """ rospy.Rate work-alike for a SimClock """
+        self.clock = clock
+        self.period = 1.0 / hz
+        self.last = clock.now()
+
+    def sleep(self):
+        """ sleeps until one period after the previous sleep ended """
+        wake = self.last + self.period
+        now = self.clock.now()
+        if wake > now:
+            self.clock.sleep(wake - now)
+            self.last = wake
+        else:
+            # overran the period, start over from now like rospy.Rate does
+            self.last = now
@@ -0,0 +1,103 @@
+import shutil
+import unittest
+import numpy as np
+from mat import mat
+from algorithms import Algorithms
+from diagnostics import Diagnostics, OFF
+from clock import SimClock
+from snapshot import SnapshotBuffer
+from kinematic_sim import KinematicUAV, LockstepSim, fly_mission
+from plan import calc_chi_waypoint
+from utils import format_chi
+from replay import replay
+
+try:
+    import waypoint_node
+except ImportError:
+    waypoint_node = None
+
+
+class clock_test(unittest.TestCase):
+    def test_rateAdvancesSimulatedTime(self):
+        clock = SimClock(dt=0.01)
+        steps = []
+        clock.add_step_callback(lambda t, dt: steps.append(t))
+        rate = clock.rate(20)
+        for k in range(10):
+            rate.sleep()
+        self.assertAlmostEqual(clock.now(), 0.5, 9)
+        self.assertEqual(len(steps), 50)
+
+    def test_lockstepMatchesOfflineRun(self):
+        # the stand-in simulator in lockstep with a guidance loop flies the
+        # same as the offline simulator
+        W = mat([[0, 500, 500, 0], [0, 0, 500, 500], [-50, -50, -50, -50]])
+        Chi = calc_chi_waypoint(W, mat([-100, 0, 0]).T)
+        offline = fly_mission(W, Chi, t_max=60.0)
+
+        clock = SimClock(dt=0.01)
+        alg = Algorithms(Diagnostics(OFF))
+        alg.compileMission(W, Chi, 50)
+        commands = SnapshotBuffer(("chi_c", "h_c", "Va_c"))
+        commands.write(0.0, 0.0, 18.0)
+        state = {}
+
+        def att_state_callback(msg):
+            state['chi'] = msg.chi
+            state['p'] = np.array([[msg.position.y], [msg.position.x], [-msg.position.z]])
+
+        LockstepSim(clock, KinematicUAV(W[:, 0], float(Chi[0])), att_state_callback,
+                    lambda: commands.read()[1])
+        rate = clock.rate(100)
+        chi_c_log = []
+        newpath = 1
+        while clock.now() < 60.0 - 1e-9:
+            flag, r, q, c, rho, lamb, i, dp = alg.followWppDubins(W, Chi, state['p'], 50, newpath)
+            newpath = 0
+            e, chi_c, h_c = alg.pathFollowerFast(flag, r, q, state['p'], state['chi'], np.pi / 2, 0.0125, c, rho,
+                                                 lamb, 3.5)
+            commands.write(format_chi(chi_c), h_c, 18.0)
+            chi_c_log.append(format_chi(chi_c))
+            rate.sleep()
+
+        np.testing.assert_allclose(chi_c_log, offline.chi_c, rtol=0, atol=1e-9)
+
+    @unittest.skipIf(waypoint_node is None, "waypoint_node needs rospy and the sua messages")
+    def test_lockstepNode(self):
+        # the real UAV setUp and run_algorithms on a SimClock, with its topics
+        # on a SimTransport
+        clock = SimClock(dt=0.01)
+
+        def time_limit(t, dt):
+            # a mission that never ends would hang the test
+            if t > 600.0:
+                clock.request_shutdown()
+
+        clock.add_step_callback(time_limit)
+        uav = waypoint_node.lockstep_uav(False, clock)
+        if uav.recorder is not None:
+            self.addCleanup(shutil.rmtree, uav.recorder.directory)
+        uav.alg.diag.level = OFF
+        uav.run_algorithms()
+
+        # the path manager ran out of waypoints before the time limit
+        self.assertFalse(clock.is_shutdown())
+        self.assertEqual(uav.transport.counts['waypoints'], 3)
+        published = uav.transport.counts[waypoint_node.COMMAND_TOPIC]
+        self.assertEqual(published, uav.cycle_hist.count)
+        self.assertEqual(uav.publisher_commands.reads, published)
+        self.assertEqual(uav.publisher_commands.stale_reads, 0)
+        # every command is published on the step of the state it follows
+        self.assertEqual(uav.state_latency.count, published)
+        self.assertLess(uav.state_latency.max, 1e-9)
+
+        # the node's own recording replays to the same commands
+        if uav.recorder is not None:
+            result = replay(uav.recorder.directory)
+            self.assertEqual(result.dropped, 0)
+            self.assertEqual(result.rows, published)
+            self.assertTrue(result.equivalent(), result.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
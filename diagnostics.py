@@ -0,0 +1,73 @@
+from __future__ import print_function
+
+from timeit import default_timer
+
+DEBUG = 10
+INFO = 20
+WARN = 30
+OFF = 100
+
+
+class Diagnostics:
+    def __init__(self, level=INFO, sink=print, timer=default_timer):
+        """
+        Diagnostics is a small leveled logger for the guidance hot path.
+        Messages are formatted only when they are emitted, per key rate
+        limits drop repeats, and transition() only speaks when a tracked
+        value changes. Callers can test debug_on/info_on/warn_on before
+        calling in so a disabled level costs a single attribute lookup.
+
+        Member Variables:
+            level = lowest level that is emitted (DEBUG, INFO, WARN or OFF)
+            sink = function called with every emitted line
+            timer = returns the time (s) rate limits are measured on
+            last = time each rate limited key was last emitted
+            suppressed = number of messages dropped per key since then
+            values = last value seen by transition() per key
+        """
+
+        self.sink = sink
+        self.timer = timer
+        self.last = {}
+        self.suppressed = {}
+        self.values = {}
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        self.debug_on = level <= DEBUG
+        self.info_on = level <= INFO
+        self.warn_on = level <= WARN
+
+    def log(self, level, key, period, fmt, *args):
+        """ emits fmt.format(*args) at most once every period seconds for key """
+        if level < self.level:
+            return
+        suffix = ""
+        if period > 0:
+            now = self.timer()
+            last = self.last.get(key)
+            if last is not None and now - last < period:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return
+            self.last[key] = now
+            dropped = self.suppressed.pop(key, 0)
+            if dropped:
+                suffix = " ({0} similar suppressed)".format(dropped)
+        self.sink(fmt.format(*args) + suffix)
+
+    def debug(self, key, period, fmt, *args):
+        self.log(DEBUG, key, period, fmt, *args)
+
+    def info(self, key, period, fmt, *args):
+        self.log(INFO, key, period, fmt, *args)
+
+    def warn(self, key, period, fmt, *args):
+        self.log(WARN, key, period, fmt, *args)
+
+    def transition(self, level, key, value, fmt, *args):
+        """ emits fmt.format(*args) only when value differs from the last one seen for key """
+        if level < self.level or self.values.get(key) == value:
+            return
+        self.values[key] = value
+        self.sink(fmt.format(*args))
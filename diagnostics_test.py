@@ -0,0 +1,77 @@
+import unittest
+from diagnostics import Diagnostics, DEBUG, INFO, WARN, OFF
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class diagnostics_test(unittest.TestCase):
+    def setUp(self):
+        self.lines = []
+        self.clock = FakeClock()
+        self.diag = Diagnostics(INFO, self.lines.append, self.clock)
+
+    def test_rateLimited(self):
+        for k in range(5):
+            self.diag.info("key", 1.0, "message {0}", k)
+            self.clock.t += 0.3
+        # emitted at t = 0 and t = 1.2, the three in between are dropped
+        self.assertEqual(self.lines, ["message 0", "message 4 (3 similar suppressed)"])
+
+        # keys are limited independently, and a period of 0 never limits
+        self.diag.info("other", 1.0, "other")
+        self.diag.info("key", 0, "unlimited")
+        self.diag.info("key", 0, "unlimited")
+        self.assertEqual(self.lines[2:], ["other", "unlimited", "unlimited"])
+
+    def test_suppressedCountResets(self):
+        self.diag.warn("key", 1.0, "a")
+        self.diag.warn("key", 1.0, "b")
+        self.clock.t = 1.0
+        self.diag.warn("key", 1.0, "c")
+        self.clock.t = 2.0
+        self.diag.warn("key", 1.0, "d")
+        self.assertEqual(self.lines, ["a", "c (1 similar suppressed)", "d"])
+
+    def test_transitionOnlyOnChange(self):
+        for value in (1, 1, 2, 2, 2, 1):
+            self.diag.transition(INFO, "state", value, "state {0}", value)
+        self.assertEqual(self.lines, ["state 1", "state 2", "state 1"])
+
+    def test_levels(self):
+        self.diag.debug("key", 0, "debug")
+        self.diag.info("key", 0, "info")
+        self.diag.warn("key", 0, "warn")
+        self.diag.transition(DEBUG, "state", 1, "debug transition")
+        self.assertEqual(self.lines, ["info", "warn"])
+        self.assertEqual((self.diag.debug_on, self.diag.info_on, self.diag.warn_on), (False, True, True))
+
+        self.diag.set_level(OFF)
+        self.diag.warn("key", 0, "warn")
+        self.diag.transition(WARN, "state", 2, "warn transition")
+        self.assertEqual(self.lines, ["info", "warn"])
+        self.assertFalse(self.diag.warn_on)
+
+        # a suppressed transition is not remembered, so it is reported once enabled
+        self.diag.set_level(DEBUG)
+        self.diag.transition(DEBUG, "state", 1, "debug transition")
+        self.assertEqual(self.lines[-1], "debug transition")
+        self.assertTrue(self.diag.debug_on)
+
+    def test_formatOnlyWhenEmitted(self):
+        class Unformattable:
+            def __format__(self, spec):
+                raise AssertionError("formatted a message that was not emitted")
+
+        self.diag.debug("key", 0, "{0}", Unformattable())
+        self.diag.info("key", 1.0, "first")
+        self.diag.info("key", 1.0, "{0}", Unformattable())
+
+
+if __name__ == '__main__':
+    unittest.main()
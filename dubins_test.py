@@ -0,0 +1,151 @@
+import unittest
+import algorithms as Algorithms
+import numpy as np
+from mat import mat
+from utils import in_half_plane
+from loop_stats import LatencyHistogram
+
+
+def square_mission():
+    W = mat([[0, 500, 500, 0],
+             [0, 0, 500, 500],
+             [-50, -50, -50, -50]])
+    Chi = mat([0, np.pi / 2, np.pi, -np.pi / 2]).T
+    return W, Chi
+
+
+class dubins_test(unittest.TestCase):
+    def test_cacheHitsWithinSegment(self):
+        W, Chi = square_mission()
+        p = mat([0, 0, -50]).T
+        example = Algorithms.Algorithms()
+        example.followWppDubins(W, Chi, p, 50, 1)
+        for i in range(9):
+            example.followWppDubins(W, Chi, p, 50, 0)
+        self.assertEqual(example.dubins_cache.misses, 1)
+        self.assertEqual(example.dubins_cache.hits, 9)
+
+    def test_cacheMatchesDirectComputation(self):
+        W, Chi = square_mission()
+        p = mat([0, 0, -50]).T
+        example = Algorithms.Algorithms()
+        dp = example.followWppDubins(W, Chi, p, 50, 1)[-1]
+        direct = example.findDubinsParameters(W[:, 0], Chi[0], W[:, 1], Chi[1], 50)
+        self.assertEqual(dp.case, direct.case)
+        self.assertAlmostEqual(dp.L, direct.L, 9)
+        np.testing.assert_allclose(dp.z_1, direct.z_1)
+
+    def test_segmentTiming(self):
+        W, Chi = square_mission()
+        p = mat([0, 0, -50]).T
+        for compiled in (False, True):
+            example = Algorithms.Algorithms()
+            if compiled:
+                example.compileMission(W, Chi, 50)
+            example.segment_timing = LatencyHistogram("Dubins segment lookup")
+            for k in range(5):
+                example.followWppDubins(W, Chi, p, 50, k == 0)
+            # every tick is timed, compiled or not
+            self.assertEqual(example.segment_timing.count, 5)
+            self.assertGreater(example.segment_timing.max, 0)
+
+    def test_cacheClearedOnNewpath(self):
+        W, Chi = square_mission()
+        p = mat([0, 0, -50]).T
+        example = Algorithms.Algorithms()
+        example.followWppDubins(W, Chi, p, 50, 1)
+        example.followWppDubins(W, Chi, p, 50, 1)
+        self.assertEqual(example.dubins_cache.misses, 2)
+        self.assertEqual(len(example.dubins_cache.entries), 1)
+
+    def test_compiledMissionMatchesScalar(self):
+        W, Chi = square_mission()
+        example = Algorithms.Algorithms()
+        mission = example.compileMission(W, Chi, 50)
+        self.assertEqual(len(mission), 3)
+        for k in range(3):
+            direct = example.findDubinsParameters(W[:, k], Chi[k], W[:, k + 1], Chi[k + 1], 50)
+            dp = mission.segment(k)
+            self.assertEqual(dp.case, direct.case)
+            self.assertAlmostEqual(dp.L, direct.L, 9)
+            np.testing.assert_allclose(dp.c_s, direct.c_s, atol=1e-9)
+            np.testing.assert_allclose(dp.q_3, direct.q_3, atol=1e-9)
+        self.assertAlmostEqual(mission.total_length(), sum(mission.L), 9)
+
+    def test_followUsesCompiledMission(self):
+        W, Chi = square_mission()
+        p = mat([0, 0, -50]).T
+        example = Algorithms.Algorithms()
+        mission = example.compileMission(W, Chi, 50)
+        dp = example.followWppDubins(W, Chi, p, 50, 1)[-1]
+        self.assertIs(dp, mission.segment(0))
+        self.assertEqual(example.dubins_cache.misses, 0)
+
+    def test_staleMissionIgnored(self):
+        W, Chi = square_mission()
+        p = mat([0, 0, -50]).T
+        example = Algorithms.Algorithms()
+        example.compileMission(W, Chi, 50)
+        example.followWppDubins(W, Chi, p, 60, 1)
+        self.assertFalse(example.use_mission)
+        self.assertEqual(example.dubins_cache.misses, 1)
+
+    def test_batchMatchesScalar(self):
+        rng = np.random.RandomState(3)
+        N = 200
+        p_s = rng.uniform(-500, 500, (N, 3))
+        p_e = rng.uniform(-500, 500, (N, 3))
+        chi_s = rng.uniform(-np.pi, np.pi, N)
+        chi_e = rng.uniform(-np.pi, np.pi, N)
+        keep = np.linalg.norm(p_s[:, 0:2] - p_e[:, 0:2], axis=1) >= 150
+        example = Algorithms.Algorithms()
+        batch = example.findDubinsParametersBatch(p_s[keep], chi_s[keep], p_e[keep], chi_e[keep], 50)
+        self.assertEqual(set(batch.case), set([0, 1, 2, 3]))
+        for n, k in enumerate(np.flatnonzero(keep)):
+            direct = example.findDubinsParameters(p_s[k][:, None], chi_s[k], p_e[k][:, None], chi_e[k], 50)
+            self.assertEqual(batch.case[n], direct.case)
+            np.testing.assert_allclose(batch.lengths[n], np.ravel(direct.lengths), atol=1e-9)
+            for name in ("c_s", "c_e", "z_1", "q_1", "z_2", "z_3", "q_3"):
+                np.testing.assert_allclose(batch.__dict__[name][n], np.ravel(getattr(direct, name)), atol=1e-9)
+            self.assertEqual(batch.lamb_s[n], direct.lamb_s)
+            self.assertEqual(batch.lamb_e[n], direct.lamb_e)
+            self.assertAlmostEqual(batch.theta[n], direct.theta, 9)
+            self.assertAlmostEqual(batch.ell[n], direct.ell, 9)
+
+    def test_infeasibleCasesAreInf(self):
+        # left end circle is closer than 2R to the right start circle
+        example = Algorithms.Algorithms()
+        p_s = np.array([[0, 0, 0]]).T
+        p_e = np.array([[0, 150, 0]]).T
+        direct = example.findDubinsParameters(p_s, 0.0, p_e, 0.0, 50)
+        batch = example.findDubinsParametersBatch(p_s.T, [0.0], p_e.T, [0.0], 50)
+        self.assertTrue(np.isinf(direct.lengths[1]))
+        self.assertTrue(np.isinf(batch.lengths[0, 1]))
+        self.assertEqual(batch.case[0], direct.case)
+
+
+    def test_halfPlaneMatchesMatmul(self):
+        rng = np.random.RandomState(5)
+        for k in range(500):
+            p, r, n = (rng.randint(-3, 4, (3, 1)).astype(float) for j in range(3))
+            expected = 1 if (mat(p) - mat(r)).T * mat(n) >= 0 else 0
+            self.assertEqual(in_half_plane(p, r, n), expected)
+            self.assertEqual(in_half_plane(mat(p), r, mat(n)), expected)
+
+    def test_followWithPlainArrays(self):
+        # the guidance loop passes plain 3x1 ndarrays, states must advance the same as with mat
+        W, Chi = square_mission()
+        with_mat = Algorithms.Algorithms()
+        with_array = Algorithms.Algorithms()
+        with_array.compileMission(W, Chi, 50)
+        for k, north in enumerate(np.linspace(-100, 600, 50)):
+            p = np.array([[north], [60.0], [-50.0]])
+            a = with_mat.followWppDubins(W, Chi, mat(p), 50, k == 0)
+            b = with_array.followWppDubins(W, Chi, p, 50, k == 0)
+            self.assertEqual(with_mat.state, with_array.state)
+            self.assertEqual(a[0], b[0])
+            np.testing.assert_allclose(a[3], b[3], atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
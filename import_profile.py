@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Import time profile of a module, by default the waypoint node. Every module
+loaded while importing it is timed, cumulative and self time, and the
+slowest are printed
+
+    python import_profile.py [module] [-n 25]
+
+Nothing of the module runs beyond its import, so it is safe to point at a
+node script.
+"""
+from __future__ import print_function
+
+import argparse
+import sys
+from timeit import default_timer
+
+try:
+    import builtins
+except ImportError:  # Python 2
+    import __builtin__ as builtins
+
+
+class ImportProfile:
+    def __init__(self):
+        """
+        ImportProfile times imports by wrapping the builtin __import__ while
+        it is installed. Only imports that load a new module are recorded.
+
+        Member Variables:
+            entries = (module, cumulative s, self s, depth) in load order
+            failed = (module, error) of imports that raised
+        """
+
+        self.entries = []
+        self.failed = []
+        self.loaded = set()
+        self.stack = []
+        self.original = None
+
+    def install(self):
+        self.original = builtins.__import__
+        builtins.__import__ = self.timed_import
+
+    def uninstall(self):
+        builtins.__import__ = self.original
+
+    def timed_import(self, name, *args, **kwargs):
+        if name in sys.modules or (len(args) > 3 and args[3]):
+            # already loaded, or a relative import that resolves elsewhere
+            return self.original(name, *args, **kwargs)
+
+        self.stack.append(0.0)
+        start = default_timer()
+        try:
+            return self.original(name, *args, **kwargs)
+        except ImportError as e:
+            # optional imports fail and get handled all the time, only
+            # report what the profiled import itself died on
+            if len(self.stack) == 1:
+                self.failed.append((name, str(e)))
+            raise
+        finally:
+            elapsed = default_timer() - start
+            children = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            if name in sys.modules and name not in self.loaded:
+                self.loaded.add(name)
+                self.entries.append((name, elapsed, elapsed - children, len(self.stack)))
+
+    def total(self):
+        return sum(entry[1] for entry in self.entries if entry[3] == 0)
+
+    def report(self, n=25):
+        """ returns the n slowest imports by cumulative time as text """
+        lines = ["Import time {0:.1f} ms, {1} modules".format(1000 * self.total(), len(self.entries)),
+                 "{0:>10} {1:>10}  module".format("cum (ms)", "self (ms)")]
+        for name, cumulative, own, depth in sorted(self.entries, key=lambda entry: -entry[1])[:n]:
+            lines.append("{0:10.1f} {1:10.1f}  {2}{3}".format(1000 * cumulative, 1000 * own, "  " * depth, name))
+        for name, error in self.failed:
+            lines.append("failed: {0} ({1})".format(name, error))
+        return "\n".join(lines)
+
+
+def profile_import(module):
+    """ imports module with an ImportProfile installed and returns the profile """
+    profile = ImportProfile()
+    profile.install()
+    try:
+        __import__(module)
+    except ImportError:
+        pass
+    finally:
+        profile.uninstall()
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time profile of a module")
+    parser.add_argument('module', nargs='?', default='waypoint_node')
+    parser.add_argument('-n', type=int, default=25, help="number of imports to show")
+    args = parser.parse_args()
+    print(profile_import(args.module).report(args.n))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(*args):
+    return subprocess.check_output((sys.executable,) + args, cwd=HERE).decode()
+
+
+class import_profile_test(unittest.TestCase):
+    def test_profileReport(self):
+        out = run('import_profile.py', 'plan_cache', '-n', '100')
+        self.assertTrue(out.startswith("Import time"))
+        for name in ('plan_cache', 'algorithms', 'numpy'):
+            self.assertIn(" " + name + "\n", out)
+        self.assertNotIn("failed:", out)
+
+    def test_lazyImports(self):
+        # loaded by the node at startup, none of them should pull in the heavy optional modules
+        out = run('-c', "import sys, table_dp, telemetry, plan, plan_cache, algorithms; "
+                        "print(' '.join(m for m in ('matplotlib', 'rospkg', 'geodesy', 'pymavlink', 'unittest') "
+                        "if m in sys.modules))")
+        self.assertEqual(out.strip(), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
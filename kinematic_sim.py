@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+"""
+ROS free kinematic fixed-wing simulator for flying the path manager and
+path follower offline, faster than real time. Fly a QGroundControl plan with
+
+    python kinematic_sim.py missions/path_manager.plan
+"""
+from __future__ import print_function
+
+import sys
+import math as m
+import numpy as np
+from timeit import default_timer
+from mat import mat
+from algorithms import Algorithms
+from diagnostics import Diagnostics, OFF
+from plan import read_plan, calc_chi_waypoint
+from utils import format_chi
+
+GRAVITY = 9.81
+
+
+class KinematicUAV:
+    def __init__(self, p0, chi0, Va0=18.0, wind=(0.0, 0.0, 0.0), k_chi=1.5, tau_h=2.0, tau_Va=2.0,
+                 phi_max=np.radians(45), climb_max=5.0):
+        """
+        KinematicUAV is a coordinated turn model with first order course,
+        altitude and airspeed responses. Commands are taken exactly as
+        UAV.waypoint_publisher sends them: chi_c (rad), h_c (m) and Va_c (m/s).
+
+        Member Variables:
+            p = position in NED (m), a 3x1 array that is updated in place
+            psi = heading (rad)
+            chi = course over ground (rad)
+            Va = airspeed (m/s)
+            wind = wind velocity in NED (m/s)
+            k_chi = course hold gain (1/s)
+            tau_h, tau_Va = altitude and airspeed time constants (s)
+            phi_max = bank angle limit, sets the maximum turn rate (rad)
+            climb_max = climb and descent rate limit (m/s)
+        """
+
+        self.p = np.array(np.ravel(p0)[0:3], dtype=float).reshape(3, 1)
+        self.psi = float(chi0)
+        self.chi = float(chi0)
+        self.Va = float(Va0)
+        self.wind = np.array(np.ravel(wind), dtype=float)
+        self.k_chi = k_chi
+        self.tau_h = tau_h
+        self.tau_Va = tau_Va
+        self.phi_max = phi_max
+        self.climb_max = climb_max
+
+    def step(self, chi_c, h_c, Va_c, dt):
+        """ integrates the model over dt seconds with the commands held constant """
+        # course hold through a bank limited coordinated turn
+        e_chi = format_chi(chi_c - self.chi)
+        psi_dot_max = GRAVITY * m.tan(self.phi_max) / max(self.Va, 1.0)
+        psi_dot = min(max(self.k_chi * e_chi, -psi_dot_max), psi_dot_max)
+        self.psi = format_chi(self.psi + psi_dot * dt)
+
+        h = -self.p.item(2)
+        h_dot = min(max((h_c - h) / self.tau_h, -self.climb_max), self.climb_max)
+        self.Va += (Va_c - self.Va) * dt / self.tau_Va
+
+        v_n = self.Va * m.cos(self.psi) + self.wind[0]
+        v_e = self.Va * m.sin(self.psi) + self.wind[1]
+        self.p[0, 0] += v_n * dt
+        self.p[1, 0] += v_e * dt
+        self.p[2, 0] += (self.wind[2] - h_dot) * dt
+        self.chi = m.atan2(v_e, v_n)
+
+
+class SimResult:
+    def __init__(self, n):
+        """
+        SimResult holds the per tick log of a simulated mission
+
+        Member Variables:
+            t = time (s)
+            p = Nx3 position in NED (m)
+            chi = course (rad)
+            chi_c = commanded course (rad)
+            h_c = commanded altitude (m)
+            e_crosstrack = crosstrack error (m)
+            waypoint = waypoint index of the path manager
+            completed = True if the last waypoint was reached
+            completion_time = time the last waypoint was reached (s)
+            wall_time = wall clock time the run took (s)
+        """
+
+        self.t = np.zeros(n)
+        self.p = np.zeros((n, 3))
+        self.chi = np.zeros(n)
+        self.chi_c = np.zeros(n)
+        self.h_c = np.zeros(n)
+        self.e_crosstrack = np.zeros(n)
+        self.waypoint = np.zeros(n, dtype=int)
+        self.completed = False
+        self.completion_time = np.nan
+        self.wall_time = 0.0
+
+    def trim(self, n):
+        for name in ("t", "p", "chi", "chi_c", "h_c", "e_crosstrack", "waypoint"):
+            setattr(self, name, getattr(self, name)[:n])
+
+    def rms_crosstrack(self):
+        return float(np.sqrt(np.mean(self.e_crosstrack**2))) if len(self.t) else np.nan
+
+    def max_crosstrack(self):
+        return float(np.max(np.abs(self.e_crosstrack))) if len(self.t) else np.nan
+
+    def summary(self):
+        return ("{0} in {1:.1f} s simulated ({2:.2f} s wall, {3:.0f}x real time), "
+                "crosstrack rms {4:.2f} m max {5:.2f} m").format(
+                    "Completed" if self.completed else "Did not complete", self.t[-1] if len(self.t) else 0.0,
+                    self.wall_time, (self.t[-1] / self.wall_time) if self.wall_time > 0 and len(self.t) else 0.0,
+                    self.rms_crosstrack(), self.max_crosstrack())
+
+
+def fly_mission(W, Chi, R=50, chi_inf=np.pi / 2, k_path=0.0125, k_orbit=3.5, Va_c=18.0, vehicle=None,
+                dt=0.01, t_max=600.0, alg=None, recorder=None):
+    """
+    fly_mission runs the same guidance cycle as UAV.run_algorithms against a
+    KinematicUAV until the path manager runs out of waypoints or t_max.
+
+    Inputs:
+        W = 3xn matrix of waypoints in NED (m)
+        Chi = course angles at waypoints (rad)
+        R, chi_inf, k_path, k_orbit = tuning parameters from UAV.setUp
+        Va_c = commanded airspeed (m/s)
+        vehicle = KinematicUAV, starts at the first waypoint by default
+        dt = guidance and integration period (s)
+        t_max = simulated time limit (s)
+        alg = Algorithms instance, a quiet one is created by default
+        recorder = TelemetryRecorder to record every tick to, as the node does
+
+    Outputs
+        result = SimResult
+    """
+    if alg is None:
+        alg = Algorithms(Diagnostics(OFF))
+    if vehicle is None:
+        vehicle = KinematicUAV(W[:, 0], float(np.ravel(Chi)[0]), Va_c)
+    alg.compileMission(W, Chi, R)
+
+    n = int(round(t_max / dt))
+    result = SimResult(n)
+    newpath = 1
+    k = 0
+    t = 0.0
+    start = default_timer()
+    while k < n:
+        p = vehicle.p
+        try:
+            flag, r, q, c, rho, lamb, i, dp = alg.followWppDubins(W, Chi, p, R, newpath)
+        except IndexError:
+            result.completed = True
+            result.completion_time = t
+            break
+        newpath = 0
+        e_crosstrack, chi_c, h_c = alg.pathFollowerFast(flag, r, q, p, vehicle.chi, chi_inf, k_path, c, rho, lamb, k_orbit)
+        chi_c = format_chi(chi_c)
+
+        result.t[k] = t
+        result.p[k] = p.item(0), p.item(1), p.item(2)
+        result.chi[k] = vehicle.chi
+        result.chi_c[k] = chi_c
+        result.h_c[k] = h_c
+        result.e_crosstrack[k] = e_crosstrack
+        result.waypoint[k] = i
+        if recorder is not None:
+            recorder.record(t, p.item(0), p.item(1), p.item(2), vehicle.chi, chi_c, h_c, e_crosstrack, i, alg.state)
+
+        vehicle.step(chi_c, h_c, Va_c, dt)
+        t += dt
+        k += 1
+
+    result.wall_time = default_timer() - start
+    result.trim(k)
+    return result
+
+
+class StateMsg:
+    def __init__(self):
+        """ stand-in for sua/StateData with the fields att_state_callback reads """
+        self.header = _Header()
+        self.position = _Vector3()
+        self.chi = 0.0
+
+
+class _Header:
+    def __init__(self):
+        self.stamp = _Stamp()
+
+
+class _Stamp:
+    def __init__(self):
+        self.t = 0.0
+
+    def to_sec(self):
+        return self.t
+
+
+class _Vector3:
+    def __init__(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.z = 0.0
+
+
+class LockstepSim:
+    def __init__(self, clock, vehicle, state_callback, get_command):
+        """
+        LockstepSim stands in for PX4, Gazebo and the attitude bridge when
+        the node runs on a clock.SimClock. Every clock step it flies the
+        vehicle with the latest published command and hands the new state to
+        state_callback as a StateData-like message (ENU position).
+
+        Inputs:
+            clock = SimClock to step with
+            vehicle = KinematicUAV
+            state_callback = usually UAV.att_state_callback
+            get_command = returns (chi_c, h_c, Va_c), for a UAV use
+                          lambda: uav.commands.read()[1][0:3]
+        """
+
+        self.clock = clock
+        self.vehicle = vehicle
+        self.state_callback = state_callback
+        self.get_command = get_command
+        self.msg = StateMsg()
+        clock.add_step_callback(self.step)
+        self.publish_state(clock.now())
+
+    def step(self, t, dt):
+        chi_c, h_c, Va_c = self.get_command()
+        self.vehicle.step(chi_c, h_c, Va_c, dt)
+        self.publish_state(t + dt)
+
+    def publish_state(self, t):
+        p = self.vehicle.p
+        self.msg.header.stamp.t = t
+        self.msg.position.x = p.item(1)
+        self.msg.position.y = p.item(0)
+        self.msg.position.z = -p.item(2)
+        self.msg.chi = self.vehicle.chi
+        self.state_callback(self.msg)
+
+
+def fly_plan(plan_file, **kwargs):
+    """ flies a QGroundControl .plan file, see fly_mission for the keyword arguments """
+    W = read_plan(plan_file)
+    Chi = calc_chi_waypoint(W, mat([0, 0, 0]).T)
+    return fly_mission(W, Chi, **kwargs)
+
+
+if __name__ == '__main__':
+    for plan_file in sys.argv[1:]:
+        print(plan_file + ": " + fly_plan(plan_file).summary())
@@ -0,0 +1,186 @@
+import numpy as np
+from timeit import default_timer
+
+
+class LoopTimer:
+    def __init__(self, rate):
+        """
+        LoopTimer measures a fixed rate loop. Call start() at the top of
+        every cycle and stop() once the work is done.
+
+        Member Variables:
+            period = target cycle period (s)
+            cycles = number of completed cycles
+            overruns = cycles whose work took longer than period
+            busy = total time spent between start() and stop() (s)
+            max_busy = longest cycle (s)
+            elapsed = time from the first start() to the latest one (s)
+        """
+
+        self.period = 1.0 / rate
+        self.cycles = 0
+        self.overruns = 0
+        self.busy = 0.0
+        self.max_busy = 0.0
+        self.elapsed = 0.0
+        self.first = None
+        self.t_start = None
+
+    def start(self):
+        self.t_start = default_timer()
+        if self.first is None:
+            self.first = self.t_start
+        self.elapsed = self.t_start - self.first
+
+    def stop(self):
+        dt = default_timer() - self.t_start
+        self.cycles += 1
+        self.busy += dt
+        if dt > self.max_busy:
+            self.max_busy = dt
+        if dt > self.period:
+            self.overruns += 1
+        return dt
+
+    def report(self):
+        """ returns a one line summary of the loop timing """
+        if self.cycles == 0:
+            return "Guidance loop: no cycles"
+        rate = (self.cycles - 1) / self.elapsed if self.elapsed > 0 else 0.0
+        return ("Guidance loop: {0} cycles at {1:.1f} Hz (target {2:.1f} Hz), "
+                "cycle time mean {3:.3f} ms max {4:.3f} ms, {5} overruns, {6:.1f}% busy").format(
+                    self.cycles, rate, 1.0 / self.period, 1e3 * self.busy / self.cycles,
+                    1e3 * self.max_busy, self.overruns, 100.0 * self.busy / max(self.elapsed, self.busy))
+
+
+class LatencyStats:
+    def __init__(self, name):
+        """
+        LatencyStats keeps a running count, mean and max of a latency
+
+        Member Variables:
+            name = label used in report()
+            count = number of samples
+            total = sum of all samples (s)
+            max = largest sample (s)
+        """
+
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, dt):
+        self.count += 1
+        self.total += dt
+        if dt > self.max:
+            self.max = dt
+
+    def report(self):
+        """ returns a one line summary of the samples """
+        if self.count == 0:
+            return "{0}: no samples".format(self.name)
+        return "{0}: {1} samples, mean {2:.3f} ms, max {3:.3f} ms".format(
+            self.name, self.count, 1e3 * self.total / self.count, 1e3 * self.max)
+
+
+class LatencyHistogram:
+    def __init__(self, name, lowest=1e-6, highest=10.0, significant=2):
+        """
+        LatencyHistogram is a fixed size HDR style histogram. Values are
+        counted in log-linear buckets so every value between lowest and
+        highest is kept to the given number of significant digits, and
+        record() is a few integer operations with nothing allocated, cheap
+        enough to call several times per guidance cycle. Larger values are
+        counted in the top bucket, the exact max is kept separately.
+
+        Member Variables:
+            name = label used in report()
+            lowest = resolution of the smallest bucket (s)
+            counts = samples per bucket
+            count = number of samples
+            max = largest sample (s)
+        """
+
+        self.name = name
+        self.lowest = lowest
+        # sub buckets per power of two, enough for the significant digits
+        self.sub_bits = int(np.ceil(np.log2(2 * 10**significant)))
+        self.sub_count = 1 << self.sub_bits
+        self.half = self.sub_count >> 1
+        self.top = int(highest / lowest)
+        self.counts = [0] * (self.index(self.top) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def index(self, v):
+        """ bucket of the integer value v (units of lowest) """
+        if v < self.sub_count:
+            return v
+        shift = v.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half + (v >> shift) - self.half
+
+    def value(self, i):
+        """ highest value counted in bucket i (s) """
+        if i < self.sub_count:
+            return i * self.lowest
+        shift = (i - self.sub_count) // self.half + 1
+        m = (i - self.sub_count) % self.half + self.half
+        return (((m + 1) << shift) - 1) * self.lowest
+
+    def record(self, dt):
+        v = int(dt / self.lowest)
+        if v < 0:
+            v = 0
+        elif v > self.top:
+            v = self.top
+        self.counts[self.index(v)] += 1
+        self.count += 1
+        self.total += dt
+        if dt > self.max:
+            self.max = dt
+
+    def percentile(self, q):
+        """ returns the value below which q percent of the samples fall (s) """
+        if self.count == 0:
+            return np.nan
+        cumulative = np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, q / 100.0 * self.count))
+        if i >= self.index(self.top):
+            # values above highest are clamped into the top bucket
+            return self.max
+        return min(self.value(i), self.max)
+
+    def merge(self, other):
+        """ adds the samples of other, a histogram with the same buckets, to
+        this one; a thread recording into its own histogram is merged
+        after it stops """
+        if len(other.counts) != len(self.counts) or other.lowest != self.lowest:
+            raise ValueError("Cannot merge {0} into {1}, the buckets differ".format(other.name, self.name))
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def summary(self):
+        """ returns the count, mean, p50, p90, p99, p99.9 and max as a dict (s) """
+        d = {"count": self.count, "max": self.max,
+             "mean": self.total / self.count if self.count else np.nan}
+        for q in (50, 90, 99, 99.9):
+            d["p{0:g}".format(q)] = self.percentile(q)
+        return d
+
+    def report(self):
+        """ returns a one line summary of the samples """
+        if self.count == 0:
+            return "{0}: no samples".format(self.name)
+        d = self.summary()
+        return "{0}: {1} samples, p50 {2:.3f} ms, p99 {3:.3f} ms, p99.9 {4:.3f} ms, max {5:.3f} ms".format(
+            self.name, self.count, 1e3 * d["p50"], 1e3 * d["p99"], 1e3 * d["p99.9"], 1e3 * self.max)
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+from loop_stats import LatencyHistogram
+
+
+class loop_stats_test(unittest.TestCase):
+    def test_percentilesWithinResolution(self):
+        hist = LatencyHistogram("test")
+        samples = np.random.RandomState(0).lognormal(np.log(1e-4), 1.0, 20000)
+        for dt in samples:
+            hist.record(dt)
+        self.assertEqual(hist.count, len(samples))
+        self.assertEqual(hist.max, samples.max())
+        for q in (50, 90, 99):
+            self.assertAlmostEqual(hist.percentile(q) / np.percentile(samples, q), 1.0, delta=0.02)
+
+    def test_bucketsRoundTrip(self):
+        hist = LatencyHistogram("test")
+        for v in (0, 1, 255, 256, 257, 1000, 123456, hist.top):
+            i = hist.index(v)
+            # the bucket of a value holds it, within two significant digits
+            self.assertLessEqual(v * hist.lowest, hist.value(i) + 1e-15)
+            self.assertLessEqual(hist.value(i) - v * hist.lowest, 0.01 * v * hist.lowest + 1e-15)
+
+    def test_outOfRange(self):
+        hist = LatencyHistogram("test", highest=1.0)
+        hist.record(-1.0)
+        hist.record(50.0)
+        self.assertEqual(sum(hist.counts), 2)
+        self.assertEqual(hist.max, 50.0)
+        self.assertEqual(hist.percentile(100), 50.0)
+        self.assertEqual(hist.percentile(0), 0.0)
+
+    def test_emptyReport(self):
+        hist = LatencyHistogram("test")
+        self.assertEqual(hist.report(), "test: no samples")
+        self.assertTrue(np.isnan(hist.percentile(50)))
+
+    def test_merge(self):
+        first = LatencyHistogram("first")
+        second = LatencyHistogram("second")
+        both = LatencyHistogram("both")
+        for k in range(1, 1000):
+            first.record(k * 1e-5)
+            both.record(k * 1e-5)
+        for k in range(1, 100):
+            second.record(k * 3e-4)
+            both.record(k * 3e-4)
+        first.merge(second)
+        self.assertEqual(first.counts, both.counts)
+        self.assertEqual(first.count, both.count)
+        self.assertAlmostEqual(first.total, both.total)
+        self.assertEqual(first.max, both.max)
+        with self.assertRaises(ValueError):
+            first.merge(LatencyHistogram("coarse", lowest=1e-3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,10 @@ class mat(np.ndarray):
         it performs matrix multiplication by default
         instead of the standard scalar multiplcation.
         This was done because np.matrix is being
-        deprecated """
+        deprecated. It is kept for the Dubins path
+        construction and older code, the per tick
+        guidance path works on plain 3x1 ndarrays
+        since every slice here runs Python code """
     def __new__(cls, input_array, info=None):
         """ inherits from standard np.ndarray """
         obj = np.asarray(input_array).view(cls)
@@ -17,7 +20,7 @@ class mat(np.ndarray):
     def __init__(self, *args, **kwargs):
         """ call base __init__ and fix shape attribute for
         row vectors """
-        super(mat, self).__init__(*args, **kwargs)
+        super(mat, self).__init__()
         if len(self.shape) == 1:
             dim = self.shape[0]
             self.shape = (1, dim)
@@ -1,24 +1,57 @@
 #!/usr/bin/env python2
 from __future__ import division
 
-import unittest
 import rospy
 import math
 from geometry_msgs.msg import PoseStamped
 from mavros_msgs.msg import Altitude, ExtendedState, HomePosition, State, WaypointList
 from mavros_msgs.srv import CommandBool, ParamGet, SetMode, WaypointClear, WaypointPush
-from pymavlink import mavutil
 from sensor_msgs.msg import NavSatFix
+from threading import Condition, Thread
+from timeit import default_timer
+from clock import RosClock
+from transport import RosTransport
 
 DEBUG = False
 
+# member name, MAVROS service, type and whether the connection is kept open
+# for the calls the helpers repeat
+MAVROS_SERVICES = (
+    ('get_param_srv', 'mavros/param/get', ParamGet, False),
+    ('set_arming_srv', 'mavros/cmd/arming', CommandBool, True),
+    ('wp_push_srv', 'mavros/mission/push', WaypointPush, False),
+    ('wp_clear_srv', 'mavros/mission/clear', WaypointClear, False),
+    ('set_mode_srv', 'mavros/set_mode', SetMode, True),
+)
 
-class MavrosTestCommon(unittest.TestCase):
+
+def enum_name(enum, value):
+    """ returns the name of a MAVLink enum value, pymavlink is only imported
+    the first time a name is needed since it is slow to load """
+    from pymavlink import mavutil
+    return mavutil.mavlink.enums[enum][value].name
+
+
+class MavrosTestCommon(object):
     def __init__(self, *args):
         pass
         # super(MavrosTestCommon, self).__init__(*args)
 
-    def setUp(self):
+    # the unittest.TestCase checks the helpers use, a TestCase base class
+    # would pull unittest into every node start
+    def fail(self, msg=None):
+        raise AssertionError(msg)
+
+    def assertTrue(self, expr, msg=None):
+        if not expr:
+            raise AssertionError("{0} is not true : {1}".format(expr, msg))
+
+    def setUp(self, clock=None, transport=None):
+        # injectable clock and topics so a simulator can run the helpers in
+        # lockstep
+        self.clock = clock if clock is not None else RosClock()
+        self.transport = transport if transport is not None else RosTransport()
+
         self.altitude = Altitude()
         self.extended_state = ExtendedState()
         self.global_position = NavSatFix()
@@ -28,6 +61,11 @@ class MavrosTestCommon(unittest.TestCase):
         self.state = State()
         self.mav_type = None
 
+        # every callback bumps topic_gen and notifies, the helpers wait on it
+        # instead of polling
+        self.topic_cond = Condition()
+        self.topic_gen = 0
+
         self.sub_topics_ready = {
             key: False
             # for key in [
@@ -39,48 +77,31 @@ class MavrosTestCommon(unittest.TestCase):
             ]
         }
 
-        # ROS services
-        service_timeout = 30
-        if DEBUG:
-            rospy.loginfo("waiting for ROS services")
-        try:
-            rospy.wait_for_service('mavros/param/get', service_timeout)
-            rospy.wait_for_service('mavros/cmd/arming', service_timeout)
-            rospy.wait_for_service('mavros/mission/push', service_timeout)
-            rospy.wait_for_service('mavros/mission/clear', service_timeout)
-            rospy.wait_for_service('mavros/set_mode', service_timeout)
-            if DEBUG:
-                rospy.loginfo("ROS services are up")
-        except rospy.ROSException:
-            self.fail("failed to connect to services")
-        self.get_param_srv = rospy.ServiceProxy('mavros/param/get', ParamGet)
-        self.set_arming_srv = rospy.ServiceProxy('mavros/cmd/arming',
-                                                 CommandBool)
-        self.set_mode_srv = rospy.ServiceProxy('mavros/set_mode', SetMode)
-        self.wp_clear_srv = rospy.ServiceProxy('mavros/mission/clear',
-                                               WaypointClear)
-        self.wp_push_srv = rospy.ServiceProxy('mavros/mission/push',
-                                              WaypointPush)
-
         # ROS subscribers
-        self.alt_sub = rospy.Subscriber('mavros/altitude', Altitude,
-                                        self.altitude_callback)
-        self.ext_state_sub = rospy.Subscriber('mavros/extended_state',
-                                              ExtendedState,
-                                              self.extended_state_callback)
-        self.global_pos_sub = rospy.Subscriber('mavros/global_position/global',
-                                               NavSatFix,
-                                               self.global_position_callback)
-        self.home_pos_sub = rospy.Subscriber('mavros/home_position/home',
-                                             HomePosition,
-                                             self.home_position_callback)
-        self.local_pos_sub = rospy.Subscriber('mavros/local_position/pose',
-                                              PoseStamped,
-                                              self.local_position_callback)
-        self.mission_wp_sub = rospy.Subscriber('mavros/mission/waypoints',
-                                               WaypointList, self.mission_wp_callback)
-
-        self.state_sub = rospy.Subscriber('mavros/state', State, self.state_callback)
+        self.alt_sub = self.transport.subscriber('mavros/altitude', Altitude,
+                                                 self.altitude_callback)
+        self.ext_state_sub = self.transport.subscriber('mavros/extended_state',
+                                                       ExtendedState,
+                                                       self.extended_state_callback)
+        self.global_pos_sub = self.transport.subscriber('mavros/global_position/global',
+                                                        NavSatFix,
+                                                        self.global_position_callback)
+        self.home_pos_sub = self.transport.subscriber('mavros/home_position/home',
+                                                      HomePosition,
+                                                      self.home_position_callback)
+        self.local_pos_sub = self.transport.subscriber('mavros/local_position/pose',
+                                                       PoseStamped,
+                                                       self.local_position_callback)
+        self.mission_wp_sub = self.transport.subscriber('mavros/mission/waypoints',
+                                                        WaypointList, self.mission_wp_callback)
+
+        self.state_sub = self.transport.subscriber('mavros/state', State, self.state_callback)
+
+        # ROS services, after the subscribers so topics start arriving while
+        # the services are discovered. A lockstep clock means a local stand-in
+        # simulator without an FCU so there is no MAVROS to connect to
+        if not self.clock.lockstep:
+            self.connect_services(30)
 
     def tearDown(self):
         self.log_topic_vars()
@@ -95,43 +116,51 @@ class MavrosTestCommon(unittest.TestCase):
         if not self.sub_topics_ready['alt'] and not math.isnan(data.amsl):
             self.sub_topics_ready['alt'] = True
 
+        self.topic_updated()
+
     def extended_state_callback(self, data):
         if DEBUG:
             if self.extended_state.vtol_state != data.vtol_state:
                 rospy.loginfo("VTOL state changed from {0} to {1}".format(
-                    mavutil.mavlink.enums['MAV_VTOL_STATE']
-                    [self.extended_state.vtol_state].name, mavutil.mavlink.enums[
-                        'MAV_VTOL_STATE'][data.vtol_state].name))
+                    enum_name('MAV_VTOL_STATE', self.extended_state.vtol_state),
+                    enum_name('MAV_VTOL_STATE', data.vtol_state)))
 
             if self.extended_state.landed_state != data.landed_state:
                 rospy.loginfo("landed state changed from {0} to {1}".format(
-                    mavutil.mavlink.enums['MAV_LANDED_STATE']
-                    [self.extended_state.landed_state].name, mavutil.mavlink.enums[
-                        'MAV_LANDED_STATE'][data.landed_state].name))
+                    enum_name('MAV_LANDED_STATE', self.extended_state.landed_state),
+                    enum_name('MAV_LANDED_STATE', data.landed_state)))
 
         self.extended_state = data
 
         if not self.sub_topics_ready['ext_state']:
             self.sub_topics_ready['ext_state'] = True
 
+        self.topic_updated()
+
     def global_position_callback(self, data):
         self.global_position = data
 
         if not self.sub_topics_ready['global_pos']:
             self.sub_topics_ready['global_pos'] = True
 
+        self.topic_updated()
+
     def home_position_callback(self, data):
         self.home_position = data
 
         if not self.sub_topics_ready['home_pos']:
             self.sub_topics_ready['home_pos'] = True
 
+        self.topic_updated()
+
     def local_position_callback(self, data):
         self.local_position = data
 
         if not self.sub_topics_ready['local_pos']:
             self.sub_topics_ready['local_pos'] = True
 
+        self.topic_updated()
+
     def mission_wp_callback(self, data):
         if self.mission_wp.current_seq != data.current_seq:
             rospy.loginfo("current mission waypoint sequence updated: {0}".
@@ -139,9 +168,12 @@ class MavrosTestCommon(unittest.TestCase):
 
         self.mission_wp = data
 
-        if not self.sub_topics_ready['mission_wp']:
+        # mission_wp is left out of sub_topics_ready, see setUp
+        if 'mission_wp' in self.sub_topics_ready and not self.sub_topics_ready['mission_wp']:
             self.sub_topics_ready['mission_wp'] = True
 
+        self.topic_updated()
+
     def state_callback(self, data):
         if DEBUG:
             if self.state.armed != data.armed:
@@ -158,9 +190,8 @@ class MavrosTestCommon(unittest.TestCase):
 
             if self.state.system_status != data.system_status:
                 rospy.loginfo("system_status changed from {0} to {1}".format(
-                    mavutil.mavlink.enums['MAV_STATE'][
-                        self.state.system_status].name, mavutil.mavlink.enums[
-                            'MAV_STATE'][data.system_status].name))
+                    enum_name('MAV_STATE', self.state.system_status),
+                    enum_name('MAV_STATE', data.system_status)))
 
         self.state = data
 
@@ -168,35 +199,110 @@ class MavrosTestCommon(unittest.TestCase):
         if not self.sub_topics_ready['state'] and data.connected:
             self.sub_topics_ready['state'] = True
 
+        self.topic_updated()
+
+    def connect_services(self, timeout):
+        """waits for all MAVROS services at once and creates their proxies,
+        the time each took to come up is kept in service_ready_times,
+        timeout(int): seconds"""
+        if DEBUG:
+            rospy.loginfo("waiting for ROS services")
+        self.service_ready_times = {}
+        start = default_timer()  # wall time, ROS time may not run yet
+
+        def wait(service):
+            try:
+                rospy.wait_for_service(service, timeout)
+                self.service_ready_times[service] = default_timer() - start
+            except rospy.ROSException:
+                pass
+
+        threads = [Thread(target=wait, args=(service,)) for attr, service, srv_type, persistent in MAVROS_SERVICES]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+
+        missing = [service for attr, service, srv_type, persistent in MAVROS_SERVICES
+                   if service not in self.service_ready_times]
+        if missing:
+            self.fail("failed to connect to services: {0}".format(", ".join(missing)))
+        rospy.loginfo("ROS services are up | " + ", ".join(
+            "{0}: {1:.2f} s".format(service, self.service_ready_times[service])
+            for attr, service, srv_type, persistent in MAVROS_SERVICES))
+
+        for attr, service, srv_type, persistent in MAVROS_SERVICES:
+            setattr(self, attr, rospy.ServiceProxy(service, srv_type, persistent=persistent))
+
+    def reset_service(self, attr):
+        """reopens the proxy of a service after a failed call, a persistent
+        connection is not reestablished on its own"""
+        for name, service, srv_type, persistent in MAVROS_SERVICES:
+            if name == attr and persistent:
+                getattr(self, attr).close()
+                setattr(self, attr, rospy.ServiceProxy(service, srv_type, persistent=True))
+
+    def topic_updated(self):
+        """ wakes the helpers waiting in wait_until """
+        with self.topic_cond:
+            self.topic_gen += 1
+            self.topic_cond.notify_all()
+
     #
     # Helper methods
     #
+    def wait_until(self, predicate, timeout, action=None, action_period=1):
+        """wait up to timeout seconds for predicate() to hold, checking it
+        again every time a subscribed topic updates. action (e.g. a service
+        call) runs right away and then every action_period seconds while the
+        predicate is false, which is how often the polling loops used to
+        retry. Returns (success, seconds waited)"""
+        start = self.clock.now()
+        deadline = start + timeout
+        next_action = start
+        while True:
+            with self.topic_cond:
+                gen = self.topic_gen
+            if predicate():
+                return True, self.clock.now() - start
+
+            now = self.clock.now()
+            if now >= deadline:
+                return False, now - start
+            if self.clock.is_shutdown():
+                self.fail("shutdown while waiting")
+            if action is not None and now >= next_action:
+                action()
+                next_action = now + action_period
+                continue
+
+            wake = min(deadline, next_action) if action is not None else deadline
+            if self.clock.lockstep:
+                # simulated time only moves while sleeping on the clock
+                self.clock.sleep(min(wake - now, 0.01))
+                continue
+            with self.topic_cond:
+                if self.topic_gen == gen:
+                    self.topic_cond.wait(wake - now)
+
     def set_arm(self, arm, timeout):
         """arm: True to arm or False to disarm, timeout(int): seconds"""
         rospy.loginfo("setting FCU arm: {0}".format(arm))
         old_arm = self.state.armed
-        loop_freq = 1  # Hz
-        rate = rospy.Rate(loop_freq)
-        arm_set = False
-        for i in xrange(timeout * loop_freq):
-            if self.state.armed == arm:
-                arm_set = True
-                if DEBUG:
-                    rospy.loginfo("set arm success | seconds: {0} of {1}".format(
-                        i / loop_freq, timeout))
-                break
-            else:
-                try:
-                    res = self.set_arming_srv(arm)
-                    if not res.success:
-                        rospy.logerr("failed to send arm command")
-                except rospy.ServiceException as e:
-                    rospy.logerr(e)
 
+        def send_arm():
             try:
-                rate.sleep()
-            except rospy.ROSException as e:
-                self.fail(e)
+                res = self.set_arming_srv(arm)
+                if not res.success:
+                    rospy.logerr("failed to send arm command")
+            except rospy.ServiceException as e:
+                rospy.logerr(e)
+                self.reset_service('set_arming_srv')
+
+        arm_set, seconds = self.wait_until(lambda: self.state.armed == arm, timeout, send_arm)
+        if arm_set and DEBUG:
+            rospy.loginfo("set arm success | seconds: {0:.2f} of {1}".format(seconds, timeout))
 
         self.assertTrue(arm_set, (
             "failed to set arm | new arm: {0}, old arm: {1} | timeout(seconds): {2}".
@@ -207,28 +313,19 @@ class MavrosTestCommon(unittest.TestCase):
         if DEBUG:
             rospy.loginfo("setting FCU mode: {0}".format(mode))
         old_mode = self.state.mode
-        loop_freq = 1  # Hz
-        rate = rospy.Rate(loop_freq)
-        mode_set = False
-        for i in xrange(timeout * loop_freq):
-            if self.state.mode == mode:
-                mode_set = True
-                if DEBUG:
-                    rospy.loginfo("set mode success | seconds: {0} of {1}".format(
-                        i / loop_freq, timeout))
-                break
-            else:
-                try:
-                    res = self.set_mode_srv(0, mode)  # 0 is custom mode
-                    if not res.mode_sent:
-                        rospy.logerr("failed to send mode command")
-                except rospy.ServiceException as e:
-                    rospy.logerr(e)
 
+        def send_mode():
             try:
-                rate.sleep()
-            except rospy.ROSException as e:
-                self.fail(e)
+                res = self.set_mode_srv(0, mode)  # 0 is custom mode
+                if not res.mode_sent:
+                    rospy.logerr("failed to send mode command")
+            except rospy.ServiceException as e:
+                rospy.logerr(e)
+                self.reset_service('set_mode_srv')
+
+        mode_set, seconds = self.wait_until(lambda: self.state.mode == mode, timeout, send_mode)
+        if mode_set and DEBUG:
+            rospy.loginfo("set mode success | seconds: {0:.2f} of {1}".format(seconds, timeout))
 
         self.assertTrue(mode_set, (
             "failed to set mode | new mode: {0}, old mode: {1} | timeout(seconds): {2}".
@@ -240,21 +337,10 @@ class MavrosTestCommon(unittest.TestCase):
         timeout(int): seconds"""
         if DEBUG:
             rospy.loginfo("waiting for subscribed topics to be ready")
-        loop_freq = 1  # Hz
-        rate = rospy.Rate(loop_freq)
-        simulation_ready = False
-        for i in xrange(timeout * loop_freq):
-            if all(value for value in self.sub_topics_ready.values()):
-                simulation_ready = True
-                if DEBUG:
-                    rospy.loginfo("simulation topics ready | seconds: {0} of {1}".format(
-                        i / loop_freq, timeout))
-                break
-
-            try:
-                rate.sleep()
-            except rospy.ROSException as e:
-                self.fail(e)
+        simulation_ready, seconds = self.wait_until(
+            lambda: all(value for value in self.sub_topics_ready.values()), timeout)
+        if simulation_ready and DEBUG:
+            rospy.loginfo("simulation topics ready | seconds: {0:.2f} of {1}".format(seconds, timeout))
 
         self.assertTrue(simulation_ready, (
             "failed to hear from all subscribed simulation topics | topic ready flags: {0} | timeout(seconds): {1}".
@@ -262,78 +348,44 @@ class MavrosTestCommon(unittest.TestCase):
 
     def wait_for_landed_state(self, desired_landed_state, timeout, index):
         if DEBUG:
-            rospy.loginfo("waiting for landed state | state: {0}, index: {1}".format(mavutil.mavlink.enums['MAV_LANDED_STATE'][desired_landed_state].name, index))
-        loop_freq = 10  # Hz
-        rate = rospy.Rate(loop_freq)
-        landed_state_confirmed = False
-        for i in xrange(timeout * loop_freq):
-            if self.extended_state.landed_state == desired_landed_state:
-                landed_state_confirmed = True
-                if DEBUG:
-                    rospy.loginfo("landed state confirmed | seconds: {0} of {1}".format(i / loop_freq, timeout))
-                break
-
-            try:
-                rate.sleep()
-            except rospy.ROSException as e:
-                self.fail(e)
+            rospy.loginfo("waiting for landed state | state: {0}, index: {1}".format(enum_name('MAV_LANDED_STATE', desired_landed_state), index))
+        landed_state_confirmed, seconds = self.wait_until(
+            lambda: self.extended_state.landed_state == desired_landed_state, timeout)
+        if landed_state_confirmed and DEBUG:
+            rospy.loginfo("landed state confirmed | seconds: {0:.2f} of {1}".format(seconds, timeout))
 
         self.assertTrue(landed_state_confirmed, (
             "landed state not detected | desired: {0}, current: {1} | index: {2}, timeout(seconds): {3}".
-            format(mavutil.mavlink.enums['MAV_LANDED_STATE'][
-                desired_landed_state].name, mavutil.mavlink.enums[
-                    'MAV_LANDED_STATE'][self.extended_state.landed_state].name, index, timeout)))
+            format(enum_name('MAV_LANDED_STATE', desired_landed_state),
+                   enum_name('MAV_LANDED_STATE', self.extended_state.landed_state), index, timeout)))
 
     def wait_for_vtol_state(self, transition, timeout, index):
         """Wait for VTOL transition, timeout(int): seconds"""
         rospy.loginfo(
             "waiting for VTOL transition | transition: {0}, index: {1}".format(
-                mavutil.mavlink.enums['MAV_VTOL_STATE'][
-                    transition].name, index))
-        loop_freq = 10  # Hz
-        rate = rospy.Rate(loop_freq)
-        transitioned = False
-        for i in xrange(timeout * loop_freq):
-            if transition == self.extended_state.vtol_state:
-                rospy.loginfo("transitioned | seconds: {0} of {1}".format(
-                    i / loop_freq, timeout))
-                transitioned = True
-                break
-
-            try:
-                rate.sleep()
-            except rospy.ROSException as e:
-                self.fail(e)
+                enum_name('MAV_VTOL_STATE', transition), index))
+        transitioned, seconds = self.wait_until(lambda: transition == self.extended_state.vtol_state, timeout)
+        if transitioned:
+            rospy.loginfo("transitioned | seconds: {0:.2f} of {1}".format(seconds, timeout))
 
         self.assertTrue(transitioned, (
             "transition not detected | desired: {0}, current: {1} | index: {2} timeout(seconds): {3}".
-            format(mavutil.mavlink.enums['MAV_VTOL_STATE'][transition].name,
-                   mavutil.mavlink.enums['MAV_VTOL_STATE'][
-                       self.extended_state.vtol_state].name, index, timeout)))
+            format(enum_name('MAV_VTOL_STATE', transition),
+                   enum_name('MAV_VTOL_STATE', self.extended_state.vtol_state), index, timeout)))
 
     def clear_wps(self, timeout):
         """timeout(int): seconds"""
-        loop_freq = 1  # Hz
-        rate = rospy.Rate(loop_freq)
-        wps_cleared = False
-        for i in xrange(timeout * loop_freq):
-            if not self.mission_wp.waypoints:
-                wps_cleared = True
-                rospy.loginfo("clear waypoints success | seconds: {0} of {1}".
-                              format(i / loop_freq, timeout))
-                break
-            else:
-                try:
-                    res = self.wp_clear_srv()
-                    if not res.success:
-                        rospy.logerr("failed to send waypoint clear command")
-                except rospy.ServiceException as e:
-                    rospy.logerr(e)
-
+        def send_clear():
             try:
-                rate.sleep()
-            except rospy.ROSException as e:
-                self.fail(e)
+                res = self.wp_clear_srv()
+                if not res.success:
+                    rospy.logerr("failed to send waypoint clear command")
+            except rospy.ServiceException as e:
+                rospy.logerr(e)
+
+        wps_cleared, seconds = self.wait_until(lambda: not self.mission_wp.waypoints, timeout, send_clear)
+        if wps_cleared:
+            rospy.loginfo("clear waypoints success | seconds: {0:.2f} of {1}".format(seconds, timeout))
 
         self.assertTrue(wps_cleared, (
             "failed to clear waypoints | timeout(seconds): {0}".format(timeout)
@@ -345,64 +397,49 @@ class MavrosTestCommon(unittest.TestCase):
         if self.mission_wp.waypoints:
             rospy.loginfo("FCU already has mission waypoints")
 
-        loop_freq = 1  # Hz
-        rate = rospy.Rate(loop_freq)
-        wps_sent = False
-        wps_verified = False
-        for i in xrange(timeout * loop_freq):
-            if not wps_sent:
-                try:
-                    res = self.wp_push_srv(start_index=0, waypoints=waypoints)
-                    wps_sent = res.success
-                    if wps_sent:
-                        rospy.loginfo("waypoints successfully transferred")
-                except rospy.ServiceException as e:
-                    rospy.logerr(e)
-            else:
-                if len(waypoints) == len(self.mission_wp.waypoints):
-                    rospy.loginfo("number of waypoints transferred: {0}".
-                                  format(len(waypoints)))
-                    wps_verified = True
-
-            if wps_sent and wps_verified:
-                rospy.loginfo("send waypoints success | seconds: {0} of {1}".
-                              format(i / loop_freq, timeout))
-                break
+        sent = [False]
 
+        def push():
+            if sent[0]:
+                return
             try:
-                rate.sleep()
-            except rospy.ROSException as e:
-                self.fail(e)
+                res = self.wp_push_srv(start_index=0, waypoints=waypoints)
+                sent[0] = res.success
+                if sent[0]:
+                    rospy.loginfo("waypoints successfully transferred")
+            except rospy.ServiceException as e:
+                rospy.logerr(e)
+
+        wps_verified, seconds = self.wait_until(
+            lambda: sent[0] and len(waypoints) == len(self.mission_wp.waypoints), timeout, push)
+        if wps_verified:
+            rospy.loginfo("number of waypoints transferred: {0}".format(len(waypoints)))
+            rospy.loginfo("send waypoints success | seconds: {0:.2f} of {1}".format(seconds, timeout))
 
-        self.assertTrue((
-            wps_sent and wps_verified
-        ), "mission could not be transferred and verified | timeout(seconds): {0}". format(timeout))
+        self.assertTrue(wps_verified, "mission could not be transferred and verified | timeout(seconds): {0}".
+                        format(timeout))
 
     def wait_for_mav_type(self, timeout):
         """Wait for MAV_TYPE parameter, timeout(int): seconds"""
         rospy.loginfo("waiting for MAV_TYPE")
-        loop_freq = 1  # Hz
-        rate = rospy.Rate(loop_freq)
-        res = False
-        for i in xrange(timeout * loop_freq):
+        received = [False]
+
+        def get_mav_type():
             try:
                 res = self.get_param_srv('MAV_TYPE')
                 if res.success:
                     self.mav_type = res.value.integer
-                    rospy.loginfo(
-                        "MAV_TYPE received | type: {0} | seconds: {1} of {2}".
-                        format(mavutil.mavlink.enums['MAV_TYPE'][self.mav_type]
-                               .name, i / loop_freq, timeout))
-                    break
+                    received[0] = True
             except rospy.ServiceException as e:
                 rospy.logerr(e)
 
-            try:
-                rate.sleep()
-            except rospy.ROSException as e:
-                self.fail(e)
+        # a parameter is not a topic, this one is answered by the service call itself
+        mav_type_received, seconds = self.wait_until(lambda: received[0], timeout, get_mav_type)
+        if mav_type_received:
+            rospy.loginfo("MAV_TYPE received | type: {0} | seconds: {1:.2f} of {2}".format(
+                enum_name('MAV_TYPE', self.mav_type), seconds, timeout))
 
-        self.assertTrue(res.success, (
+        self.assertTrue(mav_type_received, (
             "MAV_TYPE param get failed | timeout(seconds): {0}".format(timeout)
         ))
 
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Monte Carlo sweep of the guidance tuning parameters. Every gain setting is
+flown through the kinematic simulator under several random winds and
+initial poses, spread over all cores
+
+    python mission_sweep.py missions/path_manager.plan -n 1000 -t 5 -o sweep.csv
+"""
+from __future__ import print_function, division
+
+import argparse
+import csv
+import multiprocessing
+import numpy as np
+from mat import mat
+from plan import read_plan, calc_chi_waypoint
+from kinematic_sim import KinematicUAV, fly_mission
+
+# ranges sampled uniformly for every gain setting, defaults are from UAV.setUp
+GAIN_RANGES = {
+    'chi_inf': (np.pi / 4, np.pi / 2),
+    'k_path': (0.005, 0.05),
+    'k_orbit': (1.0, 6.0),
+    'R': (40.0, 80.0),
+}
+GAIN_NAMES = ('chi_inf', 'k_path', 'k_orbit', 'R')
+WIND_MAX = 5.0  # m/s, any direction
+START_OFFSET = 30.0  # m, north and east of the first waypoint
+START_CHI_OFFSET = np.pi / 4  # rad
+
+# set in every worker by init_worker so W and Chi are only sent once
+_mission = {}
+
+
+def sample_gains(n, rng):
+    """ returns n random gain settings as dicts """
+    return [dict((name, rng.uniform(*GAIN_RANGES[name])) for name in GAIN_NAMES) for k in range(n)]
+
+
+def sample_conditions(n, rng):
+    """ returns n random (wind, start offset, start course offset) conditions """
+    conditions = []
+    for k in range(n):
+        speed = rng.uniform(0, WIND_MAX)
+        direction = rng.uniform(-np.pi, np.pi)
+        wind = (speed * np.cos(direction), speed * np.sin(direction), 0.0)
+        offset = (rng.uniform(-START_OFFSET, START_OFFSET), rng.uniform(-START_OFFSET, START_OFFSET), 0.0)
+        conditions.append((wind, offset, rng.uniform(-START_CHI_OFFSET, START_CHI_OFFSET)))
+    return conditions
+
+
+def init_worker(W, Chi, t_max):
+    _mission['W'] = W
+    _mission['Chi'] = Chi
+    _mission['t_max'] = t_max
+
+
+def run_trial(task):
+    """ flies one gain setting under one condition, returns (index, completed, rms, max, completion time) """
+    index, gains, (wind, offset, chi_offset) = task
+    W = _mission['W']
+    Chi = _mission['Chi']
+    p0 = np.ravel(W[:, 0]) + np.array(offset)
+    vehicle = KinematicUAV(p0, float(np.ravel(Chi)[0]) + chi_offset, wind=wind)
+    try:
+        result = fly_mission(W, Chi, vehicle=vehicle, t_max=_mission['t_max'], **gains)
+    except AssertionError:
+        # R too large for the waypoint spacing
+        return index, False, np.nan, np.nan, np.nan
+    return index, result.completed, result.rms_crosstrack(), result.max_crosstrack(), result.completion_time
+
+
+def sweep(W, Chi, gains, conditions, processes=None, t_max=600.0):
+    """
+    sweep flies every gain setting under every condition on a process pool
+
+    Outputs
+        rows = one dict per gain setting with the gains, the number of
+               completed trials, mean crosstrack rms, worst crosstrack error
+               and mean completion time of the completed trials
+    """
+    tasks = [(k, g, cond) for k, g in enumerate(gains) for cond in conditions]
+    pool = multiprocessing.Pool(processes, init_worker, (W, Chi, t_max))
+    try:
+        results = pool.map(run_trial, tasks, chunksize=max(1, len(tasks) // (8 * multiprocessing.cpu_count())))
+    finally:
+        pool.close()
+        pool.join()
+
+    trials = [[] for g in gains]
+    for index, completed, rms, max_error, t_done in results:
+        trials[index].append((completed, rms, max_error, t_done))
+
+    rows = []
+    for g, runs in zip(gains, trials):
+        done = [run for run in runs if run[0]]
+        row = dict(g)
+        row['trials'] = len(runs)
+        row['completed'] = len(done)
+        row['rms_crosstrack'] = np.mean([run[1] for run in done]) if done else np.nan
+        row['max_crosstrack'] = np.max([run[2] for run in done]) if done else np.nan
+        row['completion_time'] = np.mean([run[3] for run in done]) if done else np.nan
+        rows.append(row)
+    return rows
+
+
+def write_csv(rows, out_file):
+    fields = list(GAIN_NAMES) + ['trials', 'completed', 'rms_crosstrack', 'max_crosstrack', 'completion_time']
+    with open(out_file, 'w') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo sweep of the guidance tuning parameters")
+    parser.add_argument('plan', help="QGroundControl .plan file")
+    parser.add_argument('-n', '--settings', type=int, default=100, help="number of random gain settings")
+    parser.add_argument('-t', '--trials', type=int, default=5, help="random conditions flown per setting")
+    parser.add_argument('-p', '--processes', type=int, default=None, help="worker processes (default all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--t-max', type=float, default=600.0, help="simulated time limit per flight (s)")
+    parser.add_argument('-o', '--out', default=None, help="write the results to this CSV file")
+    args = parser.parse_args()
+
+    W = read_plan(args.plan)
+    Chi = calc_chi_waypoint(W, mat([0, 0, 0]).T)
+    rng = np.random.RandomState(args.seed)
+    rows = sweep(W, Chi, sample_gains(args.settings, rng), sample_conditions(args.trials, rng),
+                 args.processes, args.t_max)
+
+    rows.sort(key=lambda row: (-row['completed'], row['rms_crosstrack']))
+    print("{0:>8} {1:>8} {2:>8} {3:>6} {4:>6} {5:>10} {6:>10} {7:>10}".format(
+        'chi_inf', 'k_path', 'k_orbit', 'R', 'done', 'rms (m)', 'max (m)', 'time (s)'))
+    for row in rows[:20]:
+        print("{0:8.3f} {1:8.4f} {2:8.2f} {3:6.1f} {4:>6} {5:10.2f} {6:10.2f} {7:10.1f}".format(
+            row['chi_inf'], row['k_path'], row['k_orbit'], row['R'],
+            "{0}/{1}".format(row['completed'], row['trials']),
+            row['rms_crosstrack'], row['max_crosstrack'], row['completion_time']))
+    if args.out:
+        write_csv(rows, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -99,5 +99,87 @@ class path_follower_test(unittest.TestCase):
         cross, chi_c, h_c = example.pathFollower(flag,r,q,p,chi,chi_inf,k_path,c,rho,lamb,k_orbit)
         self.assertAlmostEqual(h_c,600,4,''.join("Crosstrack error should be 600 but it is: "+str(h_c)))
 
+    def test_batchMatchesScalar(self):
+        # the straight line and orbit cases above, interleaved in one call
+        flag = np.array([1, 2, 2, 1])
+        r = np.array([[-1000,0,-500], [np.nan]*3, [np.nan]*3, [-1000,0,-500]])
+        q = np.array([[0.7044,0.7044,0.0872], [np.nan]*3, [np.nan]*3, [0.7044,0.7044,0.0872]])
+        p = np.array([[0,0,-500], [0.875,0,0], [0.875,0,0], [0,0,-500]])
+        chi = np.array([3.2687e-18, 0.0, 0.0, 3.2687e-18])
+        c = np.array([[np.nan]*3, [0,1000,-600], [0,1000,-600], [np.nan]*3])
+        rho = np.array([np.nan, 200, 200, np.nan])
+        lamb = np.array([np.nan, 1, 1, np.nan])
+        example = Algorithms.Algorithms()
+        cross, chi_c, h_c = example.pathFollowerBatch(flag,r,q,p,chi,1.5708,0.02,c,rho,lamb,3)
+        for i in range(4):
+            s_cross, s_chi_c, s_h_c = example.pathFollower(flag[i],r[i][:,None],q[i][:,None],p[i][:,None],chi[i],
+                                                           1.5708,0.02,c[i][:,None],rho[i],lamb[i],3)
+            self.assertAlmostEqual(cross[i], float(s_cross), 9)
+            self.assertAlmostEqual(chi_c[i], float(s_chi_c), 9)
+            self.assertAlmostEqual(h_c[i], float(s_h_c), 9)
+
+    def test_batchRandomFleet(self):
+        rng = np.random.RandomState(7)
+        N = 100
+        flag = rng.randint(1, 3, N)
+        r = rng.uniform(-500, 500, (N, 3))
+        q = rng.uniform(-1, 1, (N, 3))
+        q /= np.linalg.norm(q, axis=1)[:, None]
+        p = rng.uniform(-500, 500, (N, 3))
+        c = rng.uniform(-500, 500, (N, 3))
+        chi = rng.uniform(-np.pi, np.pi, N)
+        rho = rng.uniform(50, 200, N)
+        lamb = rng.choice([-1, 1], N)
+        example = Algorithms.Algorithms()
+        cross, chi_c, h_c = example.pathFollowerBatch(flag, r, q, p, chi, 1.2, 0.02, c, rho, lamb, 3.5)
+        for i in range(N):
+            s_cross, s_chi_c, s_h_c = example.pathFollower(flag[i], r[i][:, None], q[i][:, None], p[i][:, None], chi[i],
+                                                           1.2, 0.02, c[i][:, None], rho[i], lamb[i], 3.5)
+            self.assertAlmostEqual(cross[i], float(s_cross), 9)
+            self.assertAlmostEqual(chi_c[i], float(s_chi_c), 9)
+            self.assertAlmostEqual(h_c[i], float(s_h_c), 9)
+
+    def test_fastMatchesScalar(self):
+        rng = np.random.RandomState(11)
+        example = Algorithms.Algorithms()
+        for i in range(100):
+            flag = 1 + (i % 2)
+            r, q, p, c = [rng.uniform(-500, 500, (3, 1)) for j in range(4)]
+            q /= np.linalg.norm(q)
+            chi = rng.uniform(-np.pi, np.pi)
+            args = (flag, r, q, p, chi, 1.2, 0.02, c, rng.uniform(50, 200), rng.choice([-1, 1]), 3.5)
+            s_cross, s_chi_c, s_h_c = example.pathFollower(*args)
+            cross, chi_c, h_c = example.pathFollowerFast(*args)
+            self.assertIsInstance(chi_c, float)
+            self.assertAlmostEqual(cross, float(s_cross), 9)
+            self.assertAlmostEqual(chi_c, float(s_chi_c), 9)
+            self.assertAlmostEqual(h_c, float(s_h_c), 9)
+
+    def test_batchInvalidFlag(self):
+        example = Algorithms.Algorithms()
+        z = np.zeros((1, 3))
+        self.assertRaises(Exception, example.pathFollowerBatch, [3], z, z, z, [0.0], 1, 1, z, [1], [1], 1)
+
+    def test_batchUnusedMembersNone(self):
+        # line only and orbit only batches, with the other path's members None like pathFollower takes them
+        example = Algorithms.Algorithms()
+        r = np.array([[-1000,0,-500]]).T
+        q = np.array([[0.7044,0.7044,0.0872]]).T
+        p = np.array([[0,0,-500]]).T
+        cross, chi_c, h_c = example.pathFollowerBatch([1, 1], np.hstack((r, r)).T, np.hstack((q, q)).T, np.hstack((p, p)).T,
+                                                      [0.0, 0.0], 1.5708, 0.02, None, None, None, None)
+        s_cross, s_chi_c, s_h_c = example.pathFollower(1,r,q,p,0.0,1.5708,0.02,None,None,None,None)
+        np.testing.assert_allclose(cross, float(s_cross))
+        np.testing.assert_allclose(chi_c, float(s_chi_c))
+        np.testing.assert_allclose(h_c, float(s_h_c))
+
+        c = np.array([[0,1000,-600]]).T
+        p = np.array([[0.875,0,0]]).T
+        cross, chi_c, h_c = example.pathFollowerBatch([2], None, None, p.T, [0.0], 1.5708, 0.02, c.T, [200], [1], 3)
+        s_cross, s_chi_c, s_h_c = example.pathFollower(2,None,None,p,0.0,1.5708,0.02,c,200,1,3)
+        np.testing.assert_allclose(cross, float(s_cross))
+        np.testing.assert_allclose(chi_c, float(s_chi_c))
+        np.testing.assert_allclose(h_c, float(s_h_c))
+
 if __name__ == '__main__':
     unittest.main()
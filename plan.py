@@ -0,0 +1,151 @@
+import numpy as np
+from mat import mat
+import json
+
+
+# WGS84 ellipsoid and UTM constants
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+UTM_K0 = 0.9996
+UTM_E0 = 500000.0
+UTM_N0_SOUTH = 10000000.0
+
+
+def read_plan(plan_file):
+    """ read .plan file from QGroundControl and return the 3xn waypoint
+    matrix W in NED (m) relative to the planned home position """
+    with open(plan_file, 'r') as f:
+        d = json.load(f)
+    if 'mission' in d:
+        d = d['mission']
+
+    if 'plannedHomePosition' in d:
+        home_lat = d['plannedHomePosition'][0]
+        home_lon = d['plannedHomePosition'][1]
+    else:
+        raise KeyError("No home position in .plan file")
+
+    if 'items' in d:
+        # latitude, longitude and altitude of every item in one array
+        geo = np.array([wp['params'][4:7] for wp in d['items']], dtype=float).reshape(-1, 3)
+    else:
+        raise KeyError("No waypoints in .plan file")
+
+    # null params become nan in the conversion, catch them here rather than
+    # as a bogus waypoint spacing later
+    bad = np.flatnonzero(~np.isfinite(geo).all(axis=1))
+    if len(bad):
+        k = int(bad[0])
+        raise ValueError("Mission item {0} of .plan file has no valid latitude, longitude and altitude: {1}".format(
+            k, d['items'][k]['params'][4:7]))
+
+    # project everything in the zone and hemisphere of the home position so
+    # a mission that crosses a zone boundary or the equator stays continuous
+    zone = utm_zone(home_lat, home_lon)
+    south = home_lat < 0
+    home_e, home_n = utm_from_lat_lon(home_lat, home_lon, zone, south)
+    wp_e, wp_n = utm_from_lat_lon(geo[:, 0], geo[:, 1], zone, south)
+
+    # make local by subtracting home position, home altitude is taken as 0
+    W = mat(np.empty((3, geo.shape[0])))
+    W[0] = wp_n - home_n
+    W[1] = wp_e - home_e
+    W[2] = -geo[:, 2]
+    return W
+
+
+def utm_zone(lat, lon):
+    """ returns the UTM zone number of a point, with the Norway and Svalbard exceptions """
+    zone = int((lon + 180) // 6) % 60 + 1
+    if 56 <= lat < 64 and 3 <= lon < 12:
+        zone = 32
+    elif 72 <= lat < 84 and lon >= 0:
+        if lon < 9:
+            zone = 31
+        elif lon < 21:
+            zone = 33
+        elif lon < 33:
+            zone = 35
+        elif lon < 42:
+            zone = 37
+    return zone
+
+
+def utm_from_lat_lon(lat, lon, zone, south=None):
+    """ returns (easting, northing) in m of lat and lon (deg, scalars or
+    arrays) projected in the given UTM zone, using the Krueger series of the
+    transverse Mercator projection on WGS84 (mm accurate inside the zone).
+    south picks the hemisphere of the false northing for every point, by
+    default each point uses its own """
+    n = WGS84_F / (2 - WGS84_F)
+    A = WGS84_A / (1 + n) * (1 + n**2 / 4 + n**4 / 64)
+    alpha = (n / 2 - 2 * n**2 / 3 + 5 * n**3 / 16,
+             13 * n**2 / 48 - 3 * n**3 / 5,
+             61 * n**3 / 240)
+
+    phi = np.radians(lat)
+    lamb = np.radians(lon) - np.radians(6 * zone - 183)
+    c = 2 * np.sqrt(n) / (1 + n)
+    t = np.sinh(np.arctanh(np.sin(phi)) - c * np.arctanh(c * np.sin(phi)))
+    xi = np.arctan2(t, np.cos(lamb))
+    eta = np.arctanh(np.sin(lamb) / np.sqrt(1 + t**2))
+
+    E = eta
+    N = xi
+    for j, a_j in enumerate(alpha, 1):
+        E = E + a_j * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+        N = N + a_j * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+    E = UTM_E0 + UTM_K0 * A * E
+    if south is None:
+        south = np.asarray(lat) < 0
+    N = UTM_K0 * A * N + np.where(south, UTM_N0_SOUTH, 0.0)
+    return E, N
+
+
+def calc_chi_waypoint(W, position):
+    """ returns the nx1 course angle at every waypoint of the 3xn matrix W,
+    position is the current position of the MAV in NED (m) and sets the
+    course out of the first waypoint """
+    w = np.asarray(W, dtype=float)
+    n = w.shape[1]
+
+    # work with (east, north) rows, the [E, N, 0] vectors of angle()
+    en = w[1::-1].T
+
+    # define vectors between waypoints, the first waypoint looks back at the
+    # MAV and the last one continues straight on
+    v1 = np.empty((n, 2))
+    v2 = np.empty((n, 2))
+    p = np.ravel(position)
+    v1[0] = (p[1] - en[0, 0], p[0] - en[0, 1])
+    v1[1:] = en[:-1] - en[1:]
+    v2[:-1] = en[1:] - en[:-1]
+    v2[-1] = -v1[-1]
+
+    # normailze vectors
+    v1 /= np.sqrt(np.sum(v1**2, axis=1))[:, None]
+    v2 /= np.sqrt(np.sum(v2**2, axis=1))[:, None]
+
+    # define chi sign
+    sign = np.sign(v2[:, 0] - v1[:, 0])
+    sign[sign == 0] = 1
+
+    # pick the side of the bisector normal closer to the out vector, both
+    # options are compared the way angle() measures them
+    bisector = v1 + v2
+    opt = np.column_stack((bisector[:, 1], -bisector[:, 0]))
+    cross = np.abs(opt[:, 0] * v2[:, 1] - opt[:, 1] * v2[:, 0])
+    dot = np.sum(opt * v2, axis=1)
+    opt[np.arctan2(cross, dot) >= np.arctan2(cross, -dot)] *= -1
+
+    # waypoints in a straight line fly the out vector
+    straight = (bisector[:, 0] == 0) & (bisector[:, 1] == 0)
+    opt[straight] = v2[straight]
+
+    # angle from the chi zero vector [0, 1, 0]
+    return mat(sign * np.arctan2(np.abs(opt[:, 0]), opt[:, 1])).T
+
+
+def angle(v1, v2):
+    """ returns the angle between two vectors """
+    return np.arctan2(np.linalg.norm(np.cross(v1.T, v2.T)), np.dot(v1.T, v2))
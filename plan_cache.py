@@ -0,0 +1,119 @@
+"""
+On disk cache of compiled plans. The waypoints, course angles and Dubins
+table of a plan are saved to a hidden .npz next to the .plan file, keyed on
+the plan contents and the fillet radius, so a node that restarts on the same
+mission skips parsing, projection and Dubins construction. The course out of
+the first waypoint and the first segment depend on where the MAV starts, so
+they are not cached and start_mission computes them from the live position.
+"""
+from __future__ import print_function
+
+import glob
+import hashlib
+import os
+import tempfile
+import numpy as np
+from mat import mat
+from algorithms import CompiledMission
+from plan import read_plan, calc_chi_waypoint
+
+# bump when the cached arrays change meaning
+CACHE_VERSION = 2
+
+
+def plan_digest(plan_file, R):
+    """ returns the cache key of a plan and fillet radius """
+    h = hashlib.sha1()
+    with open(plan_file, 'rb') as f:
+        h.update(f.read())
+    h.update(np.array([CACHE_VERSION, R], dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def cache_file(plan_file, digest):
+    """ returns the cache file name of a plan for a given key """
+    head, tail = os.path.split(os.path.abspath(plan_file))
+    return os.path.join(head, ".{0}.{1}.npz".format(tail, digest[:16]))
+
+
+def load_mission(plan_file, R, alg):
+    """
+    load_mission returns the compiled mission of a plan with every segment
+    that does not depend on the start position, from the cache when it is
+    up to date and otherwise by read_plan, calc_chi_waypoint and
+    alg.compileSegments, saving the result for the next start. Chi[0] is nan
+    and segment 0 is empty until start_mission fills them in.
+
+    Inputs:
+        plan_file = QGroundControl .plan file
+        R = fillet radius (m)
+        alg = Algorithms instance
+
+    Outputs
+        mission = CompiledMission
+    """
+    digest = plan_digest(plan_file, R)
+    path = cache_file(plan_file, digest)
+    if os.path.exists(path):
+        try:
+            with np.load(path) as d:
+                if str(d['digest']) == digest:
+                    return CompiledMission.from_arrays(d)
+        except (IOError, OSError, KeyError, ValueError):
+            pass
+
+    W = read_plan(plan_file)
+    # any start position gives the same course at every waypoint but the
+    # first, use the second waypoint so the first one is well defined
+    Chi = calc_chi_waypoint(W, W[:, 1])
+    Chi[0] = np.nan
+    mission = CompiledMission(W, Chi, R)
+    alg.compileSegments(mission, np.arange(1, W.shape[1] - 1))
+    save_mission(path, digest, mission)
+    return mission
+
+
+def start_mission(mission, position, alg):
+    """
+    start_mission sets the course out of the first waypoint from the start
+    position, compiles the first segment and makes mission the one alg
+    flies.
+
+    Inputs:
+        mission = CompiledMission from load_mission
+        position = 3x1 start position in NED (m)
+        alg = Algorithms instance
+
+    Outputs
+        W = 3xn matrix of waypoints in NED (m)
+        Chi = nx1 course angles at waypoints (rad)
+    """
+    W = mat(mission.W)
+    mission.Chi[0] = calc_chi_waypoint(W[:, 0:2], position).item(0)
+    alg.compileSegments(mission, [0])
+    alg.mission = mission
+    return W, mat(mission.Chi).T
+
+
+def save_mission(path, digest, mission):
+    """ writes the cache file atomically and removes older caches of the same plan """
+    head, tail = os.path.split(path)
+    plan_name = tail[1:].rsplit('.', 2)[0]
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=head, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, digest=np.array(digest), **mission.arrays())
+        os.rename(tmp, path)
+    except (IOError, OSError) as e:
+        print("Could not write plan cache {0}: {1}".format(path, e))
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+        return
+
+    for old in glob.glob(os.path.join(head, ".{0}.*.npz".format(plan_name))):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
@@ -0,0 +1,197 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from mat import mat
+from algorithms import Algorithms
+from diagnostics import Diagnostics, OFF
+from plan import read_plan, utm_zone, utm_from_lat_lon, calc_chi_waypoint, angle
+from plan_cache import load_mission, start_mission
+
+PLAN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'missions', 'path_manager.plan')
+
+
+def calc_chi_waypoint_loop(W, position):
+    """ the original per waypoint implementation of calc_chi_waypoint """
+    m, n = W.shape
+    Chi = mat(np.zeros(n)).T
+
+    # define chi zero vector
+    v0 = mat([0, 1, 0]).T
+
+    # set chi for other waypoints
+    for i in range(0, n):
+
+        # define vectors between waypoints
+        if i == 0:
+            v1 = mat([float(position[1]), float(position[0]), 0]).T - \
+                mat([W[1, i], W[0, i], 0]).T
+            v2 = mat([W[1, i + 1], W[0, i + 1], 0]).T - \
+                mat([W[1, i], W[0, i], 0]).T
+
+        elif i == n - 1:
+            v1 = mat([W[1, i - 1], W[0, i - 1], 0]).T - \
+                mat([W[1, i], W[0, i], 0]).T
+            v2 = -v1
+
+        else:
+            v1 = mat([W[1, i - 1], W[0, i - 1], 0]).T - \
+                mat([W[1, i], W[0, i], 0]).T
+            v2 = mat([W[1, i + 1], W[0, i + 1], 0]).T - \
+                mat([W[1, i], W[0, i], 0]).T
+
+        # normailze vectors
+        v1 = v1 / np.linalg.norm(v1)
+        v2 = v2 / np.linalg.norm(v2)
+
+        # define chi sign
+        sign = int(np.sign(v2[0] - v1[0]))
+        if sign == 0:
+            sign = 1
+
+        bisector = v1 + v2
+
+        # check if waypoints are in a straight line
+        if bisector[0] == 0 and bisector[1] == 0:
+            Chi[i] = sign * angle(v0, v2)
+        else:
+            # define both chi options
+            opt1 = mat([float(bisector[1]), float(-bisector[0]), 0]).T
+            opt2 = mat([float(-bisector[1]), float(bisector[0]), 0]).T
+
+            # determine which option is closer to the out vector
+            opt1_dist = angle(opt1, v2)
+            opt2_dist = angle(opt2, v2)
+
+            # assign chi accordingly
+            if abs(opt1_dist) < abs(opt2_dist):
+                Chi[i] = sign * angle(v0, opt1)
+            else:
+                Chi[i] = sign * angle(v0, opt2)
+
+    return Chi
+
+
+class plan_test(unittest.TestCase):
+    def test_utmReference(self):
+        # CN Tower, 17T 630084 4833438
+        self.assertEqual(utm_zone(43.642567, -79.387139), 17)
+        E, N = utm_from_lat_lon(43.642567, -79.387139, 17)
+        self.assertAlmostEqual(E, 630084, delta=1)
+        self.assertAlmostEqual(N, 4833438, delta=1)
+
+    def test_utmVectorized(self):
+        lat = np.array([41.74049004, 41.74043432, -33.8568])
+        lon = np.array([-111.80473474, -111.81105347, -111.0])
+        E, N = utm_from_lat_lon(lat, lon, 12)
+        for k in range(len(lat)):
+            e, n = utm_from_lat_lon(lat[k], lon[k], 12)
+            self.assertAlmostEqual(E[k], e, 6)
+            self.assertAlmostEqual(N[k], n, 6)
+
+    def test_readPlan(self):
+        W = read_plan(PLAN_FILE)
+        self.assertEqual(W.shape, (3, 5))
+        np.testing.assert_allclose(W[2], -50)
+        # first two waypoints are about 525 m apart along a parallel
+        self.assertAlmostEqual(np.linalg.norm(W[0:2, 1] - W[0:2, 0]), 525.5, delta=1)
+
+    def test_readLargePlan(self):
+        n = 5000
+        items = [{"params": [0, 0, 0, None, 41.74 + 1e-4 * k, -111.80, 50], "type": "SimpleItem"}
+                 for k in range(n)]
+        plan = {"mission": {"items": items, "plannedHomePosition": [41.74, -111.80, 1462]}}
+        with tempfile.NamedTemporaryFile('w', suffix='.plan', delete=False) as f:
+            json.dump(plan, f)
+        try:
+            W = read_plan(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(W.shape, (3, n))
+        self.assertTrue(np.all(np.diff(W[0]) > 0))
+
+    def test_readPlanAcrossEquator(self):
+        # about 111 m steps from 0.003 deg south to 0.003 deg north
+        items = [{"params": [0, 0, 0, None, -0.003 + 1e-3 * k, 30.0, 50], "type": "SimpleItem"}
+                 for k in range(7)]
+        plan = {"mission": {"items": items, "plannedHomePosition": [-0.003, 30.0, 10]}}
+        with tempfile.NamedTemporaryFile('w', suffix='.plan', delete=False) as f:
+            json.dump(plan, f)
+        try:
+            W = read_plan(f.name)
+        finally:
+            os.remove(f.name)
+        np.testing.assert_allclose(np.diff(W[0]), 110.6, atol=0.5)
+        np.testing.assert_allclose(W[1], 0, atol=1e-2)
+
+    def test_readPlanNullParams(self):
+        items = [{"params": [0, 0, 0, None, 41.74, -111.80, 50], "type": "SimpleItem"},
+                 {"params": [0, 0, 0, None, 41.75, None, 50], "type": "SimpleItem"}]
+        plan = {"mission": {"items": items, "plannedHomePosition": [41.74, -111.80, 1462]}}
+        with tempfile.NamedTemporaryFile('w', suffix='.plan', delete=False) as f:
+            json.dump(plan, f)
+        try:
+            with self.assertRaises(ValueError) as cm:
+                read_plan(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertIn("Mission item 1", str(cm.exception))
+
+    def test_planCache(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            plan_file = os.path.join(tmp, 'mission.plan')
+            shutil.copy(PLAN_FILE, plan_file)
+            caches = os.path.join(tmp, '.mission.plan.*.npz')
+
+            cold = Algorithms(Diagnostics(OFF))
+            W, Chi = start_mission(load_mission(plan_file, 50, cold), mat([0, 0, 0]).T, cold)
+            self.assertEqual(len(glob.glob(caches)), 1)
+
+            # a warm start from somewhere else reuses the cache, only the
+            # first course angle and segment follow the new start position
+            p1 = mat([-300, 120, -40]).T
+            warm = Algorithms(Diagnostics(OFF))
+            W2, Chi2 = start_mission(load_mission(plan_file, 50, warm), p1, warm)
+            self.assertEqual(len(glob.glob(caches)), 1)
+            np.testing.assert_array_equal(W2, W)
+            self.assertEqual(Chi2.shape, Chi.shape)
+            np.testing.assert_array_equal(Chi2[1:], Chi[1:])
+
+            fresh = Algorithms(Diagnostics(OFF))
+            expected = fresh.compileMission(read_plan(plan_file), calc_chi_waypoint(read_plan(plan_file), p1), 50)
+            np.testing.assert_array_equal(Chi2, np.asarray(expected.Chi).reshape(-1, 1))
+            self.assertTrue(warm.mission.matches(W2, Chi2, 50))
+            for name in expected.ARRAYS + expected.VECTORS:
+                np.testing.assert_array_equal(getattr(warm.mission, name), getattr(expected, name))
+
+            # a different radius is a different key and replaces the old cache
+            start_mission(load_mission(plan_file, 60, warm), p1, warm)
+            self.assertEqual(len(glob.glob(caches)), 1)
+            self.assertEqual(warm.mission.R, 60)
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_chiMatchesLoop(self):
+        rng = np.random.RandomState(0)
+        for k in range(200):
+            n = rng.randint(2, 15)
+            # coarse grid so collinear waypoints and ties come up often
+            W = mat(rng.randint(-4, 5, (3, n)) * 100.0)
+            if np.any(np.all(np.diff(np.asarray(W[0:2]), axis=1) == 0, axis=0)):
+                continue
+            p = mat(rng.randint(-4, 5, 3) * 100.0 + 1.0).T
+            np.testing.assert_array_equal(calc_chi_waypoint(W, p), calc_chi_waypoint_loop(W, p))
+
+    def test_chiStraightLine(self):
+        W = mat([[0, 100, 200, 300], [0, 0, 0, 0], [-50, -50, -50, -50]])
+        Chi = calc_chi_waypoint(W, mat([-100, 0, 0]).T)
+        self.assertEqual(Chi.shape, (4, 1))
+        np.testing.assert_array_equal(Chi, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+Offline replay of a telemetry recording. The recorded states are fed through
+followWppDubins and pathFollowerFast as fast as they can be computed and the
+commands are diffed against the commands recorded in flight, to check that a
+change to the guidance code is bit for bit (or within a tolerance) the same
+before it flies. Rows the recorder had to drop are not guidance differences:
+the first row after a gap is not compared and the path manager is resynced
+to its recorded waypoint and state there.
+
+    python replay.py telemetry/20260101_120000 [--atol 1e-9]
+
+The columns are memory mapped and replayed a chunk at a time, so a recording
+of any length runs in constant memory.
+"""
+from __future__ import print_function
+
+import argparse
+import sys
+from timeit import default_timer
+import numpy as np
+from mat import mat
+from algorithms import Algorithms
+from diagnostics import Diagnostics, OFF
+from telemetry import load_telemetry, load_header, load_guidance
+from utils import format_chi
+
+# recorded outputs of the guidance cycle, compared with atol
+COMMAND_FIELDS = ("chi_c", "h_c", "e_crosstrack")
+# recorded path manager state, compared exactly
+STATE_FIELDS = ("waypoint", "state")
+
+
+class ReplayResult:
+    def __init__(self):
+        """
+        ReplayResult holds the difference between the replayed and recorded
+        commands, accumulated chunk by chunk
+
+        Member Variables:
+            rows = number of rows replayed
+            recorded_rows = number of rows in the recording
+            max_error = largest absolute difference of every compared field
+            mismatches = rows outside the tolerance of every compared field
+            first_mismatch = (row, field) of the first difference, or None
+            ended_early = row the path manager ran out of waypoints at, None
+                          if it lasted the whole recording
+            dropped = rows the recorder dropped, None if it was not closed
+            gaps = [row, count] of every run of dropped rows
+            gap_differences = rows after a gap whose commands differ, these
+                              are not mismatches
+            wall_time = wall clock time the replay took (s)
+        """
+
+        self.rows = 0
+        self.recorded_rows = 0
+        self.max_error = dict((name, 0.0) for name in COMMAND_FIELDS + STATE_FIELDS)
+        self.mismatches = dict((name, 0) for name in COMMAND_FIELDS + STATE_FIELDS)
+        self.first_mismatch = None
+        self.ended_early = None
+        self.dropped = None
+        self.gaps = []
+        self.gap_differences = 0
+        self.wall_time = 0.0
+
+    def add(self, offset, recorded, replayed, n, atol, skip=()):
+        """ compares the first n rows of a chunk starting at row offset,
+        except the rows in skip, which follow a gap in the recording """
+        gap = np.zeros(n, dtype=bool)
+        gap[list(skip)] = True
+        gap_same = np.ones(n, dtype=bool)
+        for name in COMMAND_FIELDS + STATE_FIELDS:
+            a = np.asarray(recorded[name][:n], dtype=float)
+            b = np.asarray(replayed[name][:n], dtype=float)
+            error = np.abs(b - a)
+            tolerance = atol if name in COMMAND_FIELDS else 0.0
+            # nan is the same as nan, anything else is compared by value
+            same = (a == b) | (error <= tolerance) | (np.isnan(a) & np.isnan(b))
+            gap_same &= same | ~gap
+            same |= gap
+            error[gap] = np.nan
+            finite = error[~np.isnan(error)]
+            if len(finite):
+                self.max_error[name] = max(self.max_error[name], float(finite.max()))
+            bad = np.flatnonzero(~same)
+            self.mismatches[name] += len(bad)
+            if len(bad) and (self.first_mismatch is None or offset + bad[0] < self.first_mismatch[0]):
+                self.first_mismatch = (offset + int(bad[0]), name)
+        self.gap_differences += int(np.count_nonzero(~gap_same))
+        self.rows += n
+
+    def equivalent(self):
+        return self.first_mismatch is None and self.ended_early is None
+
+    def summary(self):
+        lines = ["{0} of {1} rows replayed in {2:.2f} s ({3:.0f} rows/s): {4}".format(
+            self.rows, self.recorded_rows, self.wall_time, self.rows / self.wall_time if self.wall_time > 0 else 0.0,
+            "equivalent" if self.equivalent() else "DIFFERENT")]
+        for name in COMMAND_FIELDS + STATE_FIELDS:
+            lines.append("  {0:<13} max error {1:.3g}, {2} rows differ".format(
+                name, self.max_error[name], self.mismatches[name]))
+        if self.first_mismatch is not None:
+            lines.append("  first difference at row {0} in {1}".format(*self.first_mismatch))
+        if self.ended_early is not None:
+            lines.append("  mission ended at row {0}, before the recording did".format(self.ended_early))
+        if self.dropped is None:
+            lines.append("  warning: recorder was not closed, rows it dropped are unknown")
+        elif self.dropped:
+            lines.append("  warning: {0} rows dropped while recording in {1} gaps, resynced after each, "
+                         "{2} rows after a gap differ".format(self.dropped, len(self.gaps), self.gap_differences))
+        return "\n".join(lines)
+
+
+def replay(directory, atol=0.0, chunk=65536, alg=None):
+    """
+    replay runs the guidance of UAV.guidance_cycle on every state of a
+    recording made with record_telemetry and compares the commands.
+
+    Inputs:
+        directory = telemetry directory, with the guidance.npz the node saves
+        atol = absolute tolerance on chi_c, h_c and e_crosstrack, 0 for bit
+               for bit; waypoint and state must always match
+        chunk = rows read from disk at a time
+        alg = Algorithms instance, a quiet one is created by default
+
+    Outputs
+        result = ReplayResult
+    """
+    guidance = load_guidance(directory)
+    header = load_header(directory)
+    columns = load_telemetry(directory, mmap=True)
+    if alg is None:
+        alg = Algorithms(Diagnostics(OFF))
+
+    # the mission is compiled with the code under test, as on a cold start
+    W = mat(guidance["W"])
+    Chi = mat(guidance["Chi"]).T
+    R = guidance["R"]
+    chi_inf = guidance["chi_inf"]
+    k_path = guidance["k_path"]
+    k_orbit = guidance["k_orbit"]
+    alg.compileMission(W, Chi, R)
+
+    result = ReplayResult()
+    result.recorded_rows = n = len(columns["t"])
+    result.dropped = header.get("dropped")
+    result.gaps = header.get("gaps", [])
+    gap_rows = set(row for row, count in result.gaps)
+    replayed = dict((name, np.zeros(chunk, dtype=columns[name].dtype)) for name in COMMAND_FIELDS + STATE_FIELDS)
+    chi_c_out = replayed["chi_c"]
+    h_c_out = replayed["h_c"]
+    e_out = replayed["e_crosstrack"]
+    waypoint_out = replayed["waypoint"]
+    state_out = replayed["state"]
+    p = np.zeros((3, 1))
+    newpath = 1
+    start = default_timer()
+    for offset in range(0, n, chunk):
+        end = min(offset + chunk, n)
+        # copy the chunk out of the memory map, only one chunk is ever loaded
+        recorded = dict((name, np.array(column[offset:end])) for name, column in columns.items())
+        p_n = recorded["p_n"]
+        p_e = recorded["p_e"]
+        p_d = recorded["p_d"]
+        chi = recorded["chi"]
+        waypoint_in = recorded["waypoint"]
+        state_in = recorded["state"]
+
+        m = end - offset
+        skip = []
+        for k in range(m):
+            p[0, 0] = p_n[k]
+            p[1, 0] = p_e[k]
+            p[2, 0] = p_d[k]
+            try:
+                flag, r, q, c, rho, lamb, i, dp = alg.followWppDubins(W, Chi, p, R, newpath)
+            except IndexError:
+                result.ended_early = offset + k
+                m = k
+                break
+            newpath = 0
+            e_crosstrack, chi_c, h_c = alg.pathFollowerFast(flag, r, q, p, chi[k], chi_inf, k_path, c, rho, lamb,
+                                                            k_orbit)
+            chi_c_out[k] = format_chi(chi_c)
+            h_c_out[k] = h_c
+            e_out[k] = e_crosstrack
+            waypoint_out[k] = i
+            state_out[k] = alg.state
+            if offset + k in gap_rows:
+                # the node ran cycles the recording does not have, pick up
+                # the path manager where it was after this one
+                alg.i = int(waypoint_in[k])
+                alg.state = int(state_in[k])
+                skip.append(k)
+
+        result.add(offset, recorded, replayed, m, atol, skip)
+        if result.ended_early is not None:
+            break
+
+    result.wall_time = default_timer() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay telemetry recordings through the guidance code")
+    parser.add_argument('directories', nargs='+', help="telemetry directories")
+    parser.add_argument('--atol', type=float, default=0.0, help="tolerance on the commands, 0 for bit for bit")
+    parser.add_argument('--chunk', type=int, default=65536, help="rows read from disk at a time")
+    args = parser.parse_args()
+
+    equivalent = True
+    for directory in args.directories:
+        result = replay(directory, args.atol, args.chunk)
+        print(directory + ": " + result.summary())
+        equivalent = equivalent and result.equivalent()
+    if not equivalent:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from mat import mat
+from kinematic_sim import fly_mission
+from plan import calc_chi_waypoint
+from replay import replay
+from telemetry import TelemetryRecorder, save_guidance
+
+
+class StalledRecorder:
+    def __init__(self, recorder, stall):
+        """ flushes a TelemetryRecorder every row, except for the rows in
+        stall, so its ring fills up and drops rows there """
+        self.recorder = recorder
+        self.stall = stall
+        self.k = 0
+
+    def record(self, *values):
+        self.recorder.record(*values)
+        if self.k not in self.stall:
+            self.recorder.flush()
+        self.k += 1
+
+
+class replay_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        W = mat([[0, 500, 500, 0], [0, 0, 500, 500], [-50, -50, -50, -50]])
+        Chi = calc_chi_waypoint(W, mat([-100, 0, 0]).T)
+        recorder = TelemetryRecorder(self.directory, capacity=1 << 16)
+        self.flown = fly_mission(W, Chi, t_max=120.0, recorder=recorder)
+        recorder.close()
+        self.assertEqual(recorder.dropped, 0)
+        save_guidance(self.directory, W, Chi, 50, np.pi / 2, 0.0125, 3.5)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_bitForBit(self):
+        result = replay(self.directory)
+        self.assertTrue(result.equivalent(), result.summary())
+        self.assertEqual(result.rows, len(self.flown.t))
+        self.assertEqual(result.max_error["chi_c"], 0.0)
+
+    def test_chunksMatchWholeReplay(self):
+        whole = replay(self.directory)
+        chunked = replay(self.directory, chunk=77)
+        self.assertEqual(chunked.rows, whole.rows)
+        self.assertTrue(chunked.equivalent(), chunked.summary())
+
+    def test_differenceFound(self):
+        path = os.path.join(self.directory, "chi_c.bin")
+        chi_c = np.fromfile(path, dtype="<f8")
+        chi_c[1234] += 1e-6
+        chi_c.tofile(path)
+
+        result = replay(self.directory, chunk=500)
+        self.assertFalse(result.equivalent())
+        self.assertEqual(result.first_mismatch, (1234, "chi_c"))
+        self.assertEqual(result.mismatches["chi_c"], 1)
+        self.assertAlmostEqual(result.max_error["chi_c"], 1e-6, places=12)
+        self.assertTrue(replay(self.directory, atol=1e-5).equivalent())
+
+    def test_droppedRowsResynced(self):
+        directory = os.path.join(self.directory, "stalled")
+        W = mat([[0, 500, 500, 0], [0, 0, 500, 500], [-50, -50, -50, -50]])
+        Chi = calc_chi_waypoint(W, mat([-100, 0, 0]).T)
+        recorder = TelemetryRecorder(directory, capacity=256, period=3600.0)
+        # the ring stalls through a waypoint switch, 256 rows are kept and
+        # the rest of the stall, and the row that ends it, are dropped
+        flown = fly_mission(W, Chi, t_max=120.0, recorder=StalledRecorder(recorder, range(2500, 4000)))
+        recorder.close()
+        dropped = 1500 - 256 + 1
+        self.assertEqual(recorder.dropped, dropped)
+        self.assertEqual(recorder.gaps, [[2756, dropped]])
+        self.assertNotEqual(flown.waypoint[2755], flown.waypoint[2756 + dropped])
+        save_guidance(directory, W, Chi, 50, np.pi / 2, 0.0125, 3.5)
+
+        result = replay(directory, chunk=1000)
+        self.assertTrue(result.equivalent(), result.summary())
+        self.assertEqual(result.rows, len(flown.t) - dropped)
+        self.assertEqual(result.dropped, dropped)
+        self.assertEqual(result.gaps, [[2756, dropped]])
+        self.assertEqual(result.gap_differences, 1)
+        self.assertIn("{0} rows dropped".format(dropped), result.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
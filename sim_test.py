@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from mat import mat
+from plan import calc_chi_waypoint
+from kinematic_sim import KinematicUAV, fly_mission
+import mission_sweep
+
+
+def mission_fixture():
+    W = mat([[0, 500, 500, 0, -300],
+             [0, 0, 500, 500, 200],
+             [-50, -50, -60, -50, -50]])
+    Chi = calc_chi_waypoint(W, mat([-100, 0, 0]).T)
+    return W, Chi
+
+
+class sim_test(unittest.TestCase):
+    def test_missionCompletes(self):
+        W, Chi = mission_fixture()
+        result = fly_mission(W, Chi)
+        self.assertTrue(result.completed)
+        self.assertEqual(result.waypoint[-1], W.shape[1])
+        self.assertLess(result.max_crosstrack(), 10)
+        self.assertLess(result.wall_time, result.completion_time)
+
+    def test_missionCompletesInWind(self):
+        W, Chi = mission_fixture()
+        vehicle = KinematicUAV(W[:, 0], float(Chi[0]), wind=(3.0, -2.0, 0.0))
+        result = fly_mission(W, Chi, vehicle=vehicle)
+        self.assertTrue(result.completed)
+        self.assertLess(result.rms_crosstrack(), 10)
+
+    def test_turnRateLimited(self):
+        vehicle = KinematicUAV(np.zeros(3), 0.0, Va0=18.0)
+        vehicle.step(np.pi / 2, 0.0, 18.0, 0.1)
+        self.assertAlmostEqual(vehicle.psi, 0.1 * 9.81 / 18.0, 6)
+
+    def test_sweepAggregatesPerSetting(self):
+        W, Chi = mission_fixture()
+        rng = np.random.RandomState(0)
+        gains = mission_sweep.sample_gains(2, rng)
+        rows = mission_sweep.sweep(W, Chi, gains, mission_sweep.sample_conditions(2, rng), processes=2)
+        self.assertEqual(len(rows), 2)
+        for row, g in zip(rows, gains):
+            self.assertEqual(row['R'], g['R'])
+            self.assertEqual(row['trials'], 2)
+            self.assertEqual(row['completed'], 2)
+            self.assertGreaterEqual(row['max_crosstrack'], row['rms_crosstrack'])
+
+
+if __name__ == '__main__':
+    unittest.main()
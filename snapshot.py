@@ -0,0 +1,168 @@
+import numpy as np
+
+
+class SnapshotBuffer:
+    def __init__(self, fields):
+        """
+        SnapshotBuffer hands a set of values from one writer thread to any
+        number of reader threads without locks. The writer fills the
+        inactive slot of a double buffer and then bumps seq, a reader copies
+        the active slot and retries if the writer finished another write
+        while it was copying, so a read never mixes values from two writes.
+        read() keeps no state, each reader thread that wants read statistics
+        takes its own SnapshotReader from reader().
+
+        Member Variables:
+            fields = names of the values, in order
+            seq = number of completed writes
+        """
+
+        self.fields = tuple(fields)
+        self.slots = ([0.0] * len(self.fields), [0.0] * len(self.fields))
+        self.seq = 0
+
+    def write(self, *values):
+        """ stores a new set of values, only one thread may write """
+        self.slots[(self.seq + 1) & 1][:] = values
+        self.seq += 1
+
+    def read(self):
+        """ returns (seq, values, retries) for the latest completed write,
+        retries is the number of torn copies that had to be redone """
+        retries = 0
+        while True:
+            seq = self.seq
+            values = tuple(self.slots[seq & 1])
+            if self.seq == seq:
+                return seq, values, retries
+            retries += 1
+
+    def reader(self):
+        """ returns a new SnapshotReader of this buffer, for one thread """
+        return SnapshotReader(self)
+
+
+class SnapshotReader:
+    def __init__(self, buffer):
+        """
+        SnapshotReader reads a SnapshotBuffer for a single thread and keeps
+        that thread's read statistics, so readers on different threads never
+        share counters.
+
+        Member Variables:
+            buffer = SnapshotBuffer read from
+            reads = number of consistent reads
+            torn_reads = reads that had to be retried
+            stale_reads = reads that returned the same write as the read before
+            last_read = seq of the previous read
+        """
+
+        self.buffer = buffer
+        self.reads = 0
+        self.torn_reads = 0
+        self.stale_reads = 0
+        self.last_read = -1
+
+    def read(self):
+        """ returns (seq, values) for the latest completed write """
+        seq, values, retries = self.buffer.read()
+        self.torn_reads += retries
+        self.reads += 1
+        if seq == self.last_read:
+            self.stale_reads += 1
+        self.last_read = seq
+        return seq, values
+
+    def report(self, name):
+        """ returns a one line summary of the read and write counts """
+        return "{0}: {1} writes, {2} reads, {3} torn, {4} stale".format(
+            name, self.buffer.seq, self.reads, self.torn_reads, self.stale_reads)
+
+
+class StateRing:
+    def __init__(self, size=16):
+        """
+        StateRing keeps the last size vehicle states in preallocated arrays.
+        The writer (the state callback) converts straight into the next slot
+        and then bumps seq, a reader copies the newest slot into its own
+        buffer and retries if the writer lapped it meanwhile, so neither side
+        allocates and a read never mixes two messages.
+
+        Member Variables:
+            t = time of every state (s)
+            p = position of every state in NED (m), size x 3 x 1
+            chi = course of every state (rad)
+            seq = number of states written, the newest is in slot seq % size
+            torn_reads = reads that had to be retried
+            max_gap = longest time between two consecutive states (s)
+        """
+
+        self.size = size
+        self.t = np.zeros(size)
+        self.p = np.zeros((size, 3, 1))
+        self.chi = np.zeros(size)
+        self.seq = 0
+        self.torn_reads = 0
+        self.max_gap = 0.0
+        self.t_first = 0.0
+
+    def write(self, t, p_n, p_e, p_d, chi):
+        """ stores a new state, only one thread may write """
+        seq = self.seq
+        k = (seq + 1) % self.size
+        if seq == 0:
+            self.t_first = t
+        elif t - self.t[seq % self.size] > self.max_gap:
+            self.max_gap = t - self.t[seq % self.size]
+        self.t[k] = t
+        p = self.p[k]
+        p[0, 0] = p_n
+        p[1, 0] = p_e
+        p[2, 0] = p_d
+        self.chi[k] = chi
+        self.seq = seq + 1
+
+    def read(self, p_out):
+        """ copies the newest position into the 3x1 array p_out and returns (seq, t, chi) """
+        while True:
+            seq = self.seq
+            k = seq % self.size
+            p_out[...] = self.p[k]
+            t = self.t[k]
+            chi = self.chi[k]
+            # slot k is only rewritten once the writer has wrapped all the way around
+            if self.seq - seq < self.size - 1:
+                return seq, float(t), float(chi)
+            self.torn_reads += 1
+
+    def extrapolate(self, t, p_out):
+        """ propagates the newest position to time t at the velocity of the
+        last two states, into p_out, returns the age of the newest state (s) """
+        while True:
+            seq = self.seq
+            k = seq % self.size
+            j = (seq - 1) % self.size
+            t1 = self.t[k]
+            t0 = self.t[j]
+            p_out[...] = self.p[k]
+            dt = t - t1
+            if seq >= 2 and t1 > t0 and dt > 0:
+                p_out += (self.p[k] - self.p[j]) * (dt / (t1 - t0))
+            if self.seq - seq < self.size - 2:
+                return float(dt)
+            self.torn_reads += 1
+
+    def history(self, n):
+        """ returns copies of (t, p) of the last n states, oldest first """
+        seq = self.seq
+        n = min(n, seq, self.size - 1)
+        k = (np.arange(seq - n + 1, seq + 1)) % self.size
+        return self.t[k], self.p[k]
+
+    def report(self, name):
+        """ returns a one line summary of the state rate """
+        seq = self.seq
+        span = self.t[seq % self.size] - self.t_first
+        rate = (seq - 1) / span if seq > 1 and span > 0 else 0.0
+        return "{0}: {1} states, {2:.1f} Hz mean, longest gap {3:.1f} ms, {4} torn reads".format(
+            name, seq, rate, 1000 * self.max_gap, self.torn_reads)
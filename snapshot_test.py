@@ -0,0 +1,97 @@
+import unittest
+import numpy as np
+from threading import Thread
+from snapshot import SnapshotBuffer, StateRing
+
+
+class snapshot_test(unittest.TestCase):
+    def test_readsAreConsistent(self):
+        buf = SnapshotBuffer(("a", "b", "c"))
+        done = []
+
+        def writer():
+            for k in range(20000):
+                buf.write(k, k, k)
+            done.append(True)
+
+        reader = buf.reader()
+        t = Thread(target=writer)
+        t.start()
+        while not done:
+            seq, values = reader.read()
+            self.assertEqual(len(set(values)), 1)
+            self.assertEqual(values[0], seq - 1 if seq else 0.0)
+        t.join()
+        self.assertEqual(reader.read(), (20000, (19999, 19999, 19999)))
+        self.assertEqual(buf.read(), (20000, (19999, 19999, 19999), 0))
+
+    def test_staleReadsCounted(self):
+        buf = SnapshotBuffer(("a",))
+        reader = buf.reader()
+        buf.write(1.0)
+        reader.read()
+        reader.read()
+        buf.write(2.0)
+        self.assertEqual(reader.read(), (2, (2.0,)))
+        self.assertEqual(reader.stale_reads, 1)
+        self.assertEqual(reader.reads, 3)
+
+    def test_readersKeepTheirOwnStats(self):
+        buf = SnapshotBuffer(("a",))
+        first = buf.reader()
+        second = buf.reader()
+        buf.write(1.0)
+        first.read()
+        # reads on another reader do not make the next read of first stale
+        second.read()
+        second.read()
+        buf.write(2.0)
+        first.read()
+        self.assertEqual((first.reads, first.stale_reads), (2, 0))
+        self.assertEqual((second.reads, second.stale_reads), (2, 1))
+        self.assertEqual(first.report("commands"), "commands: 2 writes, 2 reads, 0 torn, 0 stale")
+
+    def test_stateRingReadsNewest(self):
+        ring = StateRing(4)
+        p = np.zeros((3, 1))
+        self.assertEqual(ring.read(p), (0, 0.0, 0.0))
+        for k in range(1, 11):
+            ring.write(0.1 * k, k, 2 * k, -k, 0.5)
+        seq, t, chi = ring.read(p)
+        self.assertEqual((seq, chi), (10, 0.5))
+        self.assertAlmostEqual(t, 1.0)
+        np.testing.assert_array_equal(p, [[10], [20], [-10]])
+        t, hist = ring.history(10)
+        np.testing.assert_allclose(t, [0.8, 0.9, 1.0])
+        np.testing.assert_array_equal(hist[:, 0, 0], [8, 9, 10])
+        self.assertAlmostEqual(ring.max_gap, 0.1)
+
+    def test_stateRingExtrapolates(self):
+        ring = StateRing(4)
+        p = np.zeros((3, 1))
+        ring.write(1.0, 0.0, 0.0, -50.0, 0.0)
+        ring.write(1.1, 2.0, 1.0, -50.0, 0.0)
+        age = ring.extrapolate(1.15, p)
+        self.assertAlmostEqual(age, 0.05)
+        np.testing.assert_allclose(p, [[3.0], [1.5], [-50.0]])
+
+    def test_stateRingReadsAreConsistent(self):
+        ring = StateRing(4)
+        done = []
+
+        def writer():
+            for k in range(1, 20001):
+                ring.write(k, k, k, k, k)
+            done.append(True)
+
+        t = Thread(target=writer)
+        t.start()
+        p = np.zeros((3, 1))
+        while not done:
+            seq, stamp, chi = ring.read(p)
+            self.assertEqual(set(p.ravel()) | set((stamp, chi)), set((float(seq),)))
+        t.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
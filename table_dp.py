@@ -1,69 +1,174 @@
+#!/usr/bin/env python
+"""
+Export of the Dubins parameters of every segment flown. Table writes one CSV
+row per segment as the node flies it, turn a CSV into the PNG table offline
+with
+
+    python table_dp.py a_dubins_parameters.csv
+"""
+import csv
+import os
+import sys
 import numpy as np
-from mat import mat
-import matplotlib.pyplot as plt
-import rospkg
+from diagnostics import Diagnostics
+
+CSV_NAME = 'a_dubins_parameters.csv'
+PNG_NAME = 'a_dubins_parameters.png'
+
+# rows of the rendered table, in order, with the number of CSV columns each takes
+LABELS = ("case", "L", "c_s", "lamb_s", "c_e", "lamb_e", "z_1", "q_1", "z_2", "z_3", "q_3", "lengths",
+          "theta", "ell", "c_rs", "c_ls", "c_re", "c_le")
+SIZES = {"c_s": 3, "c_e": 3, "z_1": 3, "q_1": 3, "z_2": 3, "z_3": 3, "q_3": 3, "lengths": 4,
+         "c_rs": 3, "c_ls": 3, "c_re": 3, "c_le": 3}
+INTEGERS = ("case", "lamb_s", "lamb_e")
+
+
+def open_csv(path, mode):
+    """ opens a file for the csv module, binary on Python 2 and with newline
+    translation off on Python 3, as csv documents """
+    if sys.version_info[0] < 3:
+        return open(path, mode + 'b')
+    return open(path, mode, newline='')
+
+
+def default_save_dir():
+    import rospkg
+    return rospkg.RosPack().get_path('sua') + "/grading_scripts/output/path_manager/"
 
-rospack = rospkg.RosPack()
-save_dir = rospack.get_path('sua') + "/grading_scripts/output/path_manager/"
+
+def csv_header():
+    header = []
+    for label in LABELS:
+        if label in SIZES:
+            header.extend("{0}_{1}".format(label, k) for k in range(SIZES[label]))
+        else:
+            header.append(label)
+    return header
+
+
+def dp_row(dp):
+    """ returns the CSV row of a DubinsParameters, at full precision """
+    row = []
+    for label in LABELS:
+        if label in SIZES:
+            row.extend(repr(float(x)) for x in np.ravel(getattr(dp, label))[0:SIZES[label]])
+        elif label in INTEGERS:
+            row.append(str(int(getattr(dp, label))))
+        else:
+            row.append(repr(float(getattr(dp, label))))
+    return row
 
 
 class Table:
-    def __init__(self):
-        self.L = []
-        self.c_s = []
-        self.lamb_s = []
-        self.c_e = []
-        self.lamb_e = []
-        self.z_1 = []
-        self.q_1 = []
-        self.z_2 = []
-        self.z_3 = []
-        self.q_3 = []
-        self.case = []
-        self.lengths = []
-        self.theta = []
-        self.ell = []
-        self.c_rs = []
-        self.c_ls = []
-        self.c_re = []
-        self.c_le = []
+    def __init__(self, save_dir=None, diag=None):
+        """
+        Table writes the Dubins parameters of every new segment to a CSV file
+        the moment it is appended, so the record survives a crash and
+        shutdown has nothing left to do but close the file. The file is
+        opened here, before guidance starts, and a file error disables the
+        export with one warning instead of raising into the control loop.
 
-    def write_dp(self, dp_list):
-        fig, ax = plt.subplots()
+        Member Variables:
+            save_dir = output directory, the sua grading output by default
+            csv_path = file the rows are written to, None if it could not
+                       be opened
+            rows = number of rows written
+            enabled = False once the export has been disabled by an error
+        """
+
+        self.diag = diag if diag is not None else Diagnostics()
+        self.save_dir = save_dir
+        self.csv_path = None
+        self.file = None
+        self.writer = None
+        self.appended = 0
+        self.rows = 0
+        self.enabled = True
+
+        try:
+            if self.save_dir is None:
+                self.save_dir = default_save_dir()
+            self.csv_path = os.path.join(self.save_dir, CSV_NAME)
+            self.file = open_csv(self.csv_path, 'w')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(csv_header())
+            self.file.flush()
+        except (ImportError, IOError, OSError) as e:
+            self.csv_path = None
+            self.disable(e)
 
+    def disable(self, error):
+        """ stops the export after an error, warning once """
+        self.enabled = False
+        self.diag.warn("table_dp", 0, "Dubins parameter export disabled: {0}", error)
+        self.close()
+
+    def append(self, dp):
+        """ writes a row for dp and flushes it to disk """
         # remove duplicate first entry since current self.i solution not working
         # properly. Remove this line one bug is fixed
-        dp_list = dp_list[1:]
+        self.appended += 1
+        if self.appended == 1 or not self.enabled:
+            return
+
+        try:
+            self.writer.writerow(dp_row(dp))
+            self.file.flush()
+        except (IOError, OSError) as e:
+            self.disable(e)
+            return
+        self.rows += 1
 
+    def close(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            except (IOError, OSError):
+                pass
+            self.file = None
+            self.writer = None
+
+    def write_dp(self, dp_list):
+        """ exports a whole list at once and renders the PNG table """
         for dp in dp_list:
-            self.L.append(dp.L)
-            self.c_s.append([round(x, 1) for x in dp.c_s])
-            self.lamb_s.append(dp.lamb_s)
-            self.c_e.append([round(x, 1) for x in dp.c_e])
-            self.lamb_e.append(dp.lamb_e)
-            self.z_1.append([round(x, 1) for x in dp.z_1])
-            self.q_1.append([round(x, 1) for x in dp.q_1])
-            self.z_2.append([round(x, 1) for x in dp.z_2])
-            self.z_3.append([round(x, 1) for x in dp.z_3])
-            self.q_3.append([round(x, 1) for x in dp.q_3])
-            self.case.append(dp.case)
-            self.lengths.append([round(x, 1) for x in dp.lengths])
-            self.theta.append(dp.theta)
-            self.ell.append(dp.ell)
-            self.c_rs.append([round(x, 1) for x in dp.c_rs])
-            self.c_ls.append([round(x, 1) for x in dp.c_ls])
-            self.c_re.append([round(x, 1) for x in dp.c_re])
-            self.c_le.append([round(x, 1) for x in dp.c_le])
-
-        data = [self.case, self.L, self.c_s, self.lamb_s, self.c_e, self.lamb_e, self.z_1, self.q_1, self.z_2,
-                self.z_3, self.q_3, self.lengths, self.theta, self.ell, self.c_rs, self.c_ls, self.c_re, self.c_le]
-        label = ("case", "L", "c_s", "lamb_s", "c_e", "lamb_e", "z_1", "q_1", "z_2", "z_3", "q_3", "lengths",
-                 "theta", "ell", "c_rs", "c_ls", "c_re", "c_le")
-        ax.axis('tight')
-        ax.axis('off')
-
-        color = ['xkcd:sky blue'] * 18
-        the_table = ax.table(cellText=data, rowLabels=label, rowColours=color, loc='center')
-        plt.title('Dubins Parameters')
-
-        plt.savefig(save_dir + 'a_dubins_parameters.png', dpi=300)
+            self.append(dp)
+        self.close()
+        if self.csv_path is not None:
+            render_table(self.csv_path)
+
+
+def render_table(csv_path, png_path=None):
+    """ renders a CSV written by Table as the PNG table of Dubins parameters,
+    next to the CSV by default """
+    import matplotlib.pyplot as plt
+
+    with open_csv(csv_path, 'r') as f:
+        rows = list(csv.DictReader(f))
+
+    data = []
+    for label in LABELS:
+        if label in SIZES:
+            data.append([[round(float(row["{0}_{1}".format(label, k)]), 1) for k in range(SIZES[label])]
+                         for row in rows])
+        elif label in INTEGERS:
+            data.append([int(row[label]) for row in rows])
+        else:
+            data.append([float(row[label]) for row in rows])
+
+    fig, ax = plt.subplots()
+    ax.axis('tight')
+    ax.axis('off')
+
+    color = ['xkcd:sky blue'] * len(LABELS)
+    ax.table(cellText=data, rowLabels=LABELS, rowColours=color, loc='center')
+    plt.title('Dubins Parameters')
+
+    if png_path is None:
+        png_path = os.path.join(os.path.dirname(csv_path), PNG_NAME)
+    plt.savefig(png_path, dpi=300)
+    plt.close(fig)
+
+
+if __name__ == '__main__':
+    for csv_path in sys.argv[1:]:
+        render_table(csv_path)
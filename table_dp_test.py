@@ -0,0 +1,88 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from mat import mat
+from algorithms import Algorithms
+from diagnostics import Diagnostics, OFF
+from table_dp import Table, csv_header, open_csv
+
+
+class FullDisk:
+    def writerow(self, row):
+        raise IOError(28, "No space left on device")
+
+
+class table_dp_test(unittest.TestCase):
+    def setUp(self):
+        self.save_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.save_dir)
+
+    def test_incrementalExport(self):
+        alg = Algorithms(Diagnostics(OFF))
+        W = mat([[0, 500, 500, 0, 0], [0, 0, 500, 500, 1000], [-50, -50, -50, -50, -50]])
+        Chi = mat([0, np.pi / 2, np.pi, np.pi / 2, np.pi / 2]).T
+        mission = alg.compileMission(W, Chi, 50)
+
+        tab = Table(self.save_dir)
+        for k in range(len(mission)):
+            tab.append(mission.segment(k))
+            # every row is on disk as soon as it is appended
+            with open_csv(tab.csv_path, 'r') as f:
+                self.assertEqual(len(list(csv.reader(f))), 1 + k)
+        tab.close()
+
+        with open_csv(os.path.join(self.save_dir, 'a_dubins_parameters.csv'), 'r') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), len(mission) - 1)
+        self.assertEqual(list(rows[0].keys()), csv_header())
+        # csv ends rows with \r\n itself, nothing may translate them again
+        with open(os.path.join(self.save_dir, 'a_dubins_parameters.csv'), 'rb') as f:
+            data = f.read()
+        self.assertEqual(data.count(b'\r\n'), len(mission))
+        self.assertNotIn(b'\r\r', data)
+        # the first segment is dropped like write_dp always has
+        for row, k in zip(rows, range(1, len(mission))):
+            dp = mission.segment(k)
+            self.assertEqual(int(row['case']), dp.case)
+            self.assertEqual(float(row['L']), dp.L)
+            self.assertEqual([float(row['c_e_{0}'.format(j)]) for j in range(3)], list(np.ravel(dp.c_e)))
+            self.assertEqual([float(row['lengths_{0}'.format(j)]) for j in range(4)], list(np.ravel(dp.lengths)))
+
+    def test_fileErrorsDisableExport(self):
+        alg = Algorithms(Diagnostics(OFF))
+        W = mat([[0, 500, 500, 0], [0, 0, 500, 500], [-50, -50, -50, -50]])
+        mission = alg.compileMission(W, mat([0, np.pi / 2, np.pi, np.pi / 2]).T, 50)
+        lines = []
+
+        # missing output directory, found when the table is created
+        tab = Table(os.path.join(self.save_dir, 'missing'), Diagnostics(sink=lines.append))
+        self.assertFalse(tab.enabled)
+        self.assertIsNone(tab.csv_path)
+        for k in range(len(mission)):
+            tab.append(mission.segment(k))
+        tab.close()
+        self.assertEqual(tab.rows, 0)
+        self.assertEqual(len(lines), 1)
+        self.assertIn("export disabled", lines[0])
+
+        # a write that fails mid mission
+        lines = []
+        tab = Table(self.save_dir, Diagnostics(sink=lines.append))
+        tab.append(mission.segment(0))
+        tab.append(mission.segment(1))
+        tab.writer = FullDisk()
+        for k in range(len(mission)):
+            tab.append(mission.segment(k))
+        tab.close()
+        self.assertFalse(tab.enabled)
+        self.assertEqual(tab.rows, 1)
+        self.assertEqual(len(lines), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
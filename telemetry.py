@@ -0,0 +1,219 @@
+"""
+Streaming flight recorder. The guidance loop appends one row per cycle to a
+preallocated columnar ring buffer and a background thread appends the new
+rows to one raw binary file per column, so a long 100 Hz flight can be
+loaded straight into numpy with load_telemetry (or np.memmap) later.
+"""
+from __future__ import print_function
+
+import json
+import os
+import numpy as np
+from threading import Thread, Event
+from diagnostics import Diagnostics
+
+# name and dtype of every recorded column
+TELEMETRY_FIELDS = (
+    ("t", "<f8"),  # state time (s)
+    ("p_n", "<f8"),  # position north (m)
+    ("p_e", "<f8"),  # position east (m)
+    ("p_d", "<f8"),  # position down (m)
+    ("chi", "<f8"),  # course (rad)
+    ("chi_c", "<f8"),  # commanded course (rad)
+    ("h_c", "<f8"),  # commanded altitude (m)
+    ("e_crosstrack", "<f8"),  # crosstrack error (m)
+    ("waypoint", "<i4"),  # waypoint index of the path manager
+    ("state", "<i1"),  # dubins state of the path manager
+)
+HEADER_FILE = "telemetry.json"
+GUIDANCE_FILE = "guidance.npz"
+
+
+class TelemetryRecorder:
+    def __init__(self, directory, fields=TELEMETRY_FIELDS, capacity=8192, period=0.5, diag=None):
+        """
+        TelemetryRecorder records one row per guidance cycle without
+        allocating or touching the disk on the recording thread. Rows go into
+        a ring of capacity rows, the flush thread writes everything recorded
+        since the last flush every period seconds. With period None there is
+        no flush thread and record() flushes the ring itself when it is full,
+        for a single threaded lockstep run. If the flush thread falls
+        a whole ring behind, new rows are dropped and counted rather than
+        blocking guidance. Where rows were dropped is kept as gaps and saved
+        in the header by close(), so a replay can tell a gap in the
+        recording from a change in the guidance. A file error, opening the
+        recording or writing it, disables recording with one warning instead
+        of raising into the node or killing the flush thread.
+
+        Only one thread may call record(). head is only written by the
+        recording thread and tail only by the flush thread, so no lock is
+        needed.
+
+        Member Variables:
+            directory = directory the column files are written to
+            fields = (name, dtype) of every column, in record() order
+            columns = ring buffer of every column
+            head = number of rows recorded
+            tail = number of rows written to disk
+            dropped = rows lost because the ring was full
+            gaps = [row, count] of every run of dropped rows, row is the
+                   recorded row that follows the run
+            enabled = False once recording has been disabled by an error
+        """
+
+        self.directory = directory
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.period = period
+        self.columns = [np.zeros(capacity, dtype=dtype) for name, dtype in self.fields]
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.gaps = []
+        self.diag = diag if diag is not None else Diagnostics()
+        self.enabled = True
+        self.files = []
+
+        self.stop_event = Event()
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self.write_header()
+            for name, dtype in self.fields:
+                self.files.append(open(os.path.join(directory, name + ".bin"), 'ab'))
+        except (IOError, OSError) as e:
+            self.disable(e)
+        self.thread = None
+        if period is not None:
+            self.thread = Thread(target=self.flush_loop, args=())
+            self.thread.daemon = True
+            self.thread.start()
+
+    def record(self, *values):
+        """ appends one row, values in the order of fields """
+        if not self.enabled:
+            return
+        head = self.head
+        if head - self.tail >= self.capacity and self.thread is None:
+            # no flush thread to make room
+            self.flush()
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            if self.gaps and self.gaps[-1][0] == head:
+                self.gaps[-1][1] += 1
+            else:
+                self.gaps.append([head, 1])
+            return
+        k = head % self.capacity
+        for column, value in zip(self.columns, values):
+            column[k] = value
+        self.head = head + 1
+
+    def write_header(self, closed=False):
+        """ writes the column layout, and once closed the dropped rows """
+        header = {"fields": [list(field) for field in self.fields]}
+        if closed:
+            header["dropped"] = self.dropped
+            header["gaps"] = self.gaps
+        with open(os.path.join(self.directory, HEADER_FILE), 'w') as f:
+            json.dump(header, f)
+
+    def flush(self):
+        """ writes every complete row recorded since the last flush """
+        head = self.head
+        tail = self.tail
+        if head == tail or not self.enabled:
+            return
+        a = tail % self.capacity
+        b = head % self.capacity
+        try:
+            for column, f in zip(self.columns, self.files):
+                if a < b:
+                    f.write(column[a:b].tobytes())
+                else:
+                    # the new rows wrap around the end of the ring
+                    f.write(column[a:].tobytes())
+                    f.write(column[:b].tobytes())
+                f.flush()
+        except (IOError, OSError) as e:
+            self.disable(e)
+            return
+        self.tail = head
+
+    def flush_loop(self):
+        while self.enabled and not self.stop_event.wait(self.period):
+            self.flush()
+
+    def disable(self, error):
+        """ stops recording after a file error, warning once """
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.diag.warn("telemetry", 0, "Telemetry recording to {0} disabled: {1}", self.directory, error)
+        self.close_files()
+
+    def close_files(self):
+        for f in self.files:
+            try:
+                f.close()
+            except (IOError, OSError):
+                pass
+
+    def close(self):
+        """ stops the flush thread, writes the remaining rows and the dropped
+        rows and closes the files """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        if not self.enabled:
+            return
+        self.flush()
+        self.close_files()
+        try:
+            self.write_header(closed=True)
+        except (IOError, OSError) as e:
+            self.disable(e)
+
+    def report(self):
+        """ returns a one line summary of the recording """
+        return "Telemetry: {0} rows to {1}, {2} dropped{3}".format(
+            self.tail, self.directory, self.dropped, "" if self.enabled else ", disabled by a file error")
+
+
+def load_header(directory):
+    """ returns the header of a recording, dropped and gaps are only there
+    if the recorder was closed """
+    with open(os.path.join(directory, HEADER_FILE), 'r') as f:
+        return json.load(f)
+
+
+def load_telemetry(directory, mmap=False):
+    """ returns a dict of the recorded columns, trimmed to the rows every
+    column has, mmap maps the files instead of reading them """
+    fields = load_header(directory)["fields"]
+
+    columns = {}
+    for name, dtype in fields:
+        path = os.path.join(directory, name + ".bin")
+        if mmap and os.path.getsize(path) > 0:
+            columns[name] = np.memmap(path, dtype=dtype, mode='r')
+        else:
+            columns[name] = np.fromfile(path, dtype=dtype)
+    n = min(len(column) for column in columns.values())
+    return dict((name, column[:n]) for name, column in columns.items())
+
+
+def save_guidance(directory, W, Chi, R, chi_inf, k_path, k_orbit):
+    """ saves the mission and path follower gains a recording is flown with,
+    next to the columns, so replay.py can run the same guidance on it """
+    np.savez(os.path.join(directory, GUIDANCE_FILE), W=np.array(W, dtype=float),
+             Chi=np.array(np.ravel(Chi), dtype=float), R=R, chi_inf=chi_inf, k_path=k_path, k_orbit=k_orbit)
+
+
+def load_guidance(directory):
+    """ returns the dict saved by save_guidance, with the gains as floats """
+    with np.load(os.path.join(directory, GUIDANCE_FILE)) as d:
+        guidance = dict((name, float(d[name])) for name in ("R", "chi_inf", "k_path", "k_orbit"))
+        guidance["W"] = d["W"]
+        guidance["Chi"] = d["Chi"]
+    return guidance
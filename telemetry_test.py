@@ -0,0 +1,117 @@
+import os
+import shutil
+import time
+import tempfile
+import unittest
+import numpy as np
+from diagnostics import Diagnostics
+from telemetry import TelemetryRecorder, load_telemetry, load_header, TELEMETRY_FIELDS
+
+
+class FullDisk:
+    def write(self, data):
+        raise IOError(28, "No space left on device")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class telemetry_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def rows(self, n):
+        rows = np.zeros((n, len(TELEMETRY_FIELDS)))
+        rows[:, 0] = np.arange(n) * 0.01
+        rows[:, 1:8] = np.random.RandomState(0).randn(n, 7)
+        rows[:, 8] = np.arange(n) // 100
+        rows[:, 9] = np.arange(n) % 5
+        return rows
+
+    def test_roundTrip(self):
+        # small ring and fast flushes so the rows wrap around many times
+        recorder = TelemetryRecorder(self.directory, capacity=64, period=0.001)
+        rows = self.rows(1000)
+        for row in rows:
+            while recorder.head - recorder.tail >= recorder.capacity:
+                time.sleep(0.001)  # wait for the flush thread
+            recorder.record(*row)
+        recorder.close()
+        self.assertEqual(recorder.dropped, 0)
+
+        data = load_telemetry(self.directory)
+        for k, (name, dtype) in enumerate(TELEMETRY_FIELDS):
+            self.assertEqual(data[name].dtype, np.dtype(dtype))
+            np.testing.assert_array_equal(data[name], rows[:, k].astype(dtype))
+        np.testing.assert_array_equal(load_telemetry(self.directory, mmap=True)['p_n'], rows[:, 1])
+
+    def test_fullRingDrops(self):
+        recorder = TelemetryRecorder(self.directory, capacity=16, period=60.0)
+        for row in self.rows(20):
+            recorder.record(*row)
+        self.assertEqual(recorder.dropped, 4)
+        self.assertNotIn("dropped", load_header(self.directory))
+        recorder.flush()
+        for row in self.rows(30):
+            recorder.record(*row)
+        recorder.close()
+        self.assertEqual(len(load_telemetry(self.directory)['t']), 32)
+        # 4 dropped before recorded row 16, 14 before the end
+        header = load_header(self.directory)
+        self.assertEqual(header["dropped"], 18)
+        self.assertEqual(header["gaps"], [[16, 4], [32, 14]])
+
+    def test_noFlushThread(self):
+        # record() makes room itself, nothing is dropped however fast it runs
+        recorder = TelemetryRecorder(self.directory, capacity=16, period=None)
+        rows = self.rows(100)
+        for row in rows:
+            recorder.record(*row)
+        recorder.close()
+        self.assertIsNone(recorder.thread)
+        self.assertEqual(recorder.dropped, 0)
+        np.testing.assert_array_equal(load_telemetry(self.directory)['p_n'], rows[:, 1])
+
+    def test_unwritableDirectory(self):
+        # a directory under a regular file can never be created
+        blocker = os.path.join(self.directory, "blocker")
+        open(blocker, 'w').close()
+        lines = []
+        recorder = TelemetryRecorder(os.path.join(blocker, "flight"), period=0.001, diag=Diagnostics(sink=lines.append))
+        self.assertFalse(recorder.enabled)
+        for row in self.rows(10):
+            recorder.record(*row)
+        recorder.flush()
+        recorder.close()
+        self.assertEqual(recorder.tail, 0)
+        self.assertEqual(len(lines), 1)
+        self.assertIn("disabled", recorder.report())
+
+    def test_writeErrorDisables(self):
+        lines = []
+        recorder = TelemetryRecorder(self.directory, capacity=16, period=60.0, diag=Diagnostics(sink=lines.append))
+        for row in self.rows(4):
+            recorder.record(*row)
+        recorder.flush()
+        recorder.files[3] = FullDisk()
+        for row in self.rows(4):
+            recorder.record(*row)
+        recorder.flush()
+        self.assertFalse(recorder.enabled)
+        for row in self.rows(4):
+            recorder.record(*row)
+        recorder.close()
+        self.assertEqual(recorder.tail, 4)
+        self.assertEqual(len(lines), 1)
+        # the header is left as it was opened, without dropped rows
+        self.assertNotIn("dropped", load_header(self.directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
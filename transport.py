@@ -0,0 +1,57 @@
+class RosTransport:
+    def __init__(self):
+        """
+        RosTransport is the default transport for UAV and MavrosTestCommon,
+        a thin wrapper around rospy topics so a SimTransport can be dropped
+        in instead
+        """
+        import rospy
+        self.rospy = rospy
+
+    def subscriber(self, topic, msg_type, callback):
+        return self.rospy.Subscriber(topic, msg_type, callback)
+
+    def publisher(self, topic, msg_type, queue_size):
+        return self.rospy.Publisher(topic, msg_type, queue_size=queue_size)
+
+
+class SimTransport:
+    def __init__(self):
+        """
+        SimTransport is an in-process stand-in for ROS topics for lockstep
+        SIL runs. A publish calls every subscriber of the topic right away,
+        on the publishing thread, and nothing is queued or copied.
+
+        Member Variables:
+            callbacks = subscriber callbacks of every topic
+            last = last message published on every topic
+            counts = number of messages published on every topic
+        """
+
+        self.callbacks = {}
+        self.last = {}
+        self.counts = {}
+
+    def subscriber(self, topic, msg_type, callback):
+        self.callbacks.setdefault(topic, []).append(callback)
+        return callback
+
+    def publisher(self, topic, msg_type, queue_size):
+        return SimPublisher(self, topic)
+
+    def publish(self, topic, msg):
+        """ delivers msg to every subscriber of topic """
+        self.last[topic] = msg
+        self.counts[topic] = self.counts.get(topic, 0) + 1
+        for callback in self.callbacks.get(topic, ()):
+            callback(msg)
+
+
+class SimPublisher:
+    def __init__(self, transport, topic):
+        """ rospy.Publisher work-alike for a SimTransport """
+        self.transport = transport
+        self.topic = topic
+
+    def publish(self, msg):
+        self.transport.publish(self.topic, msg)
@@ -19,9 +19,11 @@ def in_half_plane(p, r, n):
     in = in_half_plane( p,r,n )
 
     Determine whether p is in the half plane be calculating the sign of the
-    dot product.
+    dot product. The dot product is taken on the components so p, r and n
+    can be any 3x1 arrays, mat or plain ndarray, without allocating.
     """
-    if ((p - r).T * n) >= 0:
+    if ((p.item(0) - r.item(0)) * n.item(0) + (p.item(1) - r.item(1)) * n.item(1)
+            + (p.item(2) - r.item(2)) * n.item(2)) >= 0:
         return 1
     else:
         return 0
@@ -48,6 +50,17 @@ def Rz(theta):
                 [0, 0, 1]])
 
 
+def format_chi(chi_c):
+    """ makes sure chi is in the correct interval, -pi <= chi <= pi """
+    chi_c = float(chi_c)
+    while(chi_c > np.pi):
+        chi_c -= 2 * np.pi
+    while(chi_c < -np.pi):
+        chi_c += 2 * np.pi
+    assert (chi_c >= -np.pi and chi_c <= np.pi)
+    return chi_c
+
+
 def i2p(chi_q):
     """
     summary of function goes here
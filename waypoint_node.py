@@ -2,31 +2,49 @@
 
 import rospy
 import numpy as np
-from mat import mat
 from algorithms import Algorithms
 from table_dp import Table
+from loop_stats import LoopTimer, LatencyHistogram
+from snapshot import SnapshotBuffer, StateRing
+from telemetry import TelemetryRecorder, save_guidance
+from diagnostics import Diagnostics, INFO
+from plan import read_plan, calc_chi_waypoint, angle
+from plan_cache import load_mission, start_mission
+from utils import format_chi
 from sua.msg import AttitudeController, StateData, Waypoints, PathParameters
 from mavros_test_common import MavrosTestCommon
 from std_msgs.msg import Float32, Int32MultiArray
-from threading import Thread
-from time import sleep
-from ast import literal_eval
-from geodesy.utm import fromLatLong
-import rospkg
+from threading import Thread, Condition
+from time import strftime
+from timeit import default_timer
 import json
 import sys
 import os
 
 # set default plan if not passed in on command line
-rospack = rospkg.RosPack()
-PLAN_FILE = rospack.get_path('sua') + "/scripts/missions/path_manager.plan"
+PLAN_FILE = None
+DEFAULT_PLAN = "missions/path_manager.plan"
+TELEMETRY_DIR = "telemetry"
+STATE_TOPIC = 'attitude_bridge/state_data'
+COMMAND_TOPIC = 'attitude_bridge/commanded'
+
+
+def scripts_path(relative):
+    """ returns a path in the sua scripts directory. Running from the source
+    tree it is the directory of this file, otherwise rospkg is imported to
+    find the package, which is slow enough to matter at every node start """
+    here = os.path.dirname(os.path.realpath(__file__))
+    if os.path.isdir(os.path.join(here, "missions")):
+        return os.path.join(here, relative)
+    import rospkg
+    return os.path.join(rospkg.RosPack().get_path('sua'), "scripts", relative)
 
 pi = np.pi
 
 
 class UAV(MavrosTestCommon):
-    def setUp(self, path_follower):
-        super(UAV, self).setUp()
+    def setUp(self, path_follower, clock=None, transport=None):
+        super(UAV, self).setUp(clock, transport)
 
         # SUA Algorithm tuning parameters
         # ----------------------------
@@ -34,6 +52,11 @@ class UAV(MavrosTestCommon):
         self.k_path = 0.0125
         self.k_orbit = 3.5
         self.R = 50  # fillet radius (m) (This should be set to the min radius)
+        self.guidance_rate = 100  # Hz
+        self.guidance_mode = 'rate'  # 'rate' runs at guidance_rate, 'event' runs on every new state message
+        self.diag_level = INFO  # path manager diagnostics, DEBUG, INFO, WARN or OFF
+        self.record_telemetry = True  # stream every guidance cycle to scripts/telemetry/<start time>
+        self.extrapolate_state = False  # propagate the latest state to the time guidance runs
         # ----------------------------
 
         self.path_follower = path_follower
@@ -42,220 +65,324 @@ class UAV(MavrosTestCommon):
         self.h_c = 0.0
         self.Va_c = 18  # start with a constant airspeed
         self.current_waypoint = 0
-        self.tab = Table()
         self.dp_list = []
-        self.alg = Algorithms()
+        self.alg = Algorithms(Diagnostics(self.diag_level))
+        self.tab = Table(diag=self.alg.diag)
+        self.loop_timer = LoopTimer(self.guidance_rate)
+        # per cycle timing histograms, dumped by profile_report at shutdown
+        self.cycle_hist = LatencyHistogram("Guidance cycle")
+        self.manager_hist = LatencyHistogram("followWppDubins")
+        self.follower_hist = LatencyHistogram("pathFollower")
+        # state age is recorded by the thread that publishes, each thread
+        # has its own histogram and profile_report merges them
+        self.state_latency = LatencyHistogram("State age at publish (publisher)")
+        self.event_state_latency = LatencyHistogram("State age at publish (event guidance)")
+        self.alg.segment_timing = LatencyHistogram("Dubins segment lookup")
+        # one off mission setup times (s), load_mission and start_mission
+        self.setup_times = {}
+        self.state_cond = Condition()
+        self.state_seq = 0
+        self.states = StateRing(16)
+        self.last_publish = 0.0
+        self.commands = SnapshotBuffer(("chi_c", "h_c", "Va_c", "e_crosstrack", "state_stamp"))
+        self.commands.write(self.chi_c, self.h_c, self.Va_c, 0.0, 0.0)
+        # each publishing thread reads the commands through its own reader
+        self.publisher_commands = self.commands.reader()
+        self.event_commands = self.commands.reader()
         self.output = AttitudeController()
+        self.event_output = AttitudeController()
         self.e_crosstrack = Float32()
+        self.crosstrack_out = Float32()
+        self.event_crosstrack_out = Float32()
         self.waypoints = Waypoints()
         self.path_params = PathParameters()
-        self.position = mat([0, 0, 0]).T
+        self.position = np.zeros((3, 1))
         self.W = None
         self.Chi_waypoint = None
-
-        rospy.Subscriber('attitude_bridge/state_data', StateData, self.att_state_callback)
-        self.pub = rospy.Publisher('attitude_bridge/commanded', AttitudeController, queue_size=1)
-        self.crosstrack_pub = rospy.Publisher('crosstrack_error', Float32, queue_size=1)
-        self.waypoint_pub = rospy.Publisher('waypoints', Waypoints, queue_size=10)
-        self.path_pub = rospy.Publisher('path_params', PathParameters, queue_size=10)
-
-        # read waypoint file
-        self.read_plan()
-        self.calc_Chi_waypoint()
+        self.mission = None
+        self.plan_file = PLAN_FILE if PLAN_FILE is not None else scripts_path(DEFAULT_PLAN)
+        self.recorder = None
+        if self.record_telemetry:
+            # a lockstep run outpaces a wall clock flush thread, it flushes
+            # on the guidance thread instead
+            self.recorder = TelemetryRecorder(os.path.join(scripts_path(TELEMETRY_DIR), strftime("%Y%m%d_%H%M%S")),
+                                              period=None if self.clock.lockstep else 0.5, diag=self.alg.diag)
+
+        self.transport.subscriber(STATE_TOPIC, StateData, self.att_state_callback)
+        self.pub = self.transport.publisher(COMMAND_TOPIC, AttitudeController, queue_size=1)
+        self.crosstrack_pub = self.transport.publisher('crosstrack_error', Float32, queue_size=1)
+        self.waypoint_pub = self.transport.publisher('waypoints', Waypoints, queue_size=10)
+        self.path_pub = self.transport.publisher('path_params', PathParameters, queue_size=10)
+
+        # read waypoint file and build every dubins segment that does not
+        # depend on the start position before arming, warm starts load them
+        # from the compiled plan cache
+        if self.path_follower:
+            self.read_plan()
+        else:
+            t0 = default_timer()
+            self.mission = load_mission(self.plan_file, self.R, self.alg)
+            self.setup_times["load_mission"] = default_timer() - t0
+            self.W = self.mission.W
+        self.publish_waypoints()
+
+        # the course out of the first waypoint is set from the position the
+        # MAV has reached by the time the waypoints are published
+        seq, stamp, self.chi = self.states.read(self.position)
+        if self.path_follower:
+            self.calc_Chi_waypoint()
+        else:
+            t0 = default_timer()
+            self.W, self.Chi_waypoint = start_mission(self.mission, self.position, self.alg)
+            self.setup_times["start_mission"] = default_timer() - t0
+            print(self.mission.summary())
+            if self.recorder is not None and self.recorder.enabled:
+                try:
+                    save_guidance(self.recorder.directory, self.W, self.Chi_waypoint, self.R, self.chi_inf,
+                                  self.k_path, self.k_orbit)
+                except (IOError, OSError) as e:
+                    self.recorder.disable(e)
 
         if self.path_follower:
-            self.path_params.header.stamp = rospy.Time.now()
+            self.path_params.header.stamp = rospy.Time.from_sec(self.clock.now())
             self.path_params.r = traj.r
             self.path_params.q = traj.q
             self.path_params.c = traj.c
             self.path_params.rho = traj.rho
             self.path_params.lamb = traj.lamb
-            path_params_rate = rospy.Rate(0.5)
+            path_params_rate = self.clock.rate(0.5)
             for i in range(0, 3):
                 self.path_pub.publish(self.path_params)
                 path_params_rate.sleep()
 
-        # start running algorithms
-        self.pub_thread = Thread(target=self.waypoint_publisher, args=())
-        self.pub_thread.daemon = True
-        self.pub_thread.start()
+        # start running algorithms, a lockstep clock is single threaded so
+        # commands are published by the guidance loop instead
+        if not self.clock.lockstep:
+            self.pub_thread = Thread(target=self.waypoint_publisher, args=())
+            self.pub_thread.daemon = True
+            self.pub_thread.start()
 
     def tearDown(self):
         super(UAV, self).tearDown()
 
     def read_plan(self):
         """ read .plan file from QGroundControl and build W member """
-        with open(PLAN_FILE, 'r') as f:
-            d = json.load(f)
-            if 'mission' in d:
-                d = d['mission']
-
-            if 'plannedHomePosition' in d:
-                home_lat = d['plannedHomePosition'][0]
-                home_lon = d['plannedHomePosition'][1]
-                utm_home = fromLatLong(home_lat, home_lon, 0)
-                geo_home = utm_home.toPoint()
-            else:
-                raise KeyError("No home position in .plan file")
-
-            if 'items' in d:
-                for wp in d['items']:
-                    lat = float(wp['params'][4])
-                    lon = float(wp['params'][5])
-                    alt = float(wp['params'][6])
-                    utm_wp = fromLatLong(lat, lon, alt)
-                    geo_wp = utm_wp.toPoint()
-
-                    # make local by subtracting home position
-                    N = geo_wp.y - geo_home.y
-                    E = geo_wp.x - geo_home.x
-                    D = -(geo_wp.z - geo_home.z)
-
-                    if self.W is None:
-                        self.W = mat([N, E, D]).T
-                    else:
-                        self.W = mat(np.hstack((self.W, mat([N, E, D]).T)))
-            else:
-                raise KeyError("No waypoints in .plan file")
+        self.W = read_plan(self.plan_file)
 
-        self.waypoints.header.stamp = rospy.Time.now()
+    def publish_waypoints(self):
+        """ publish W for the ground station and plotting nodes """
+        self.waypoints.header.stamp = rospy.Time.from_sec(self.clock.now())
         self.waypoints.x = Int32MultiArray(data=self.W[0])
         self.waypoints.y = Int32MultiArray(data=self.W[1])
         self.waypoints.z = Int32MultiArray(data=self.W[2])
 
-        waypoint_rate = rospy.Rate(0.5)
+        waypoint_rate = self.clock.rate(0.5)
         for i in range(0, 3):
             self.waypoint_pub.publish(self.waypoints)
             waypoint_rate.sleep()
 
     def calc_Chi_waypoint(self):
-        """ read .plan file from QGroundControl and build Chi_waypoint member """
-        # lines used for debugging
-        # self.position = mat([10, 0, 50]).T
-        # self.W = mat([[0, -10, -10, 0], [10, 10, 0, 0], [50, 50, 50, 50]])
-        m, n = self.W.shape
-        self.Chi_waypoint = mat(np.zeros(n)).T
-
-        # define chi zero vector
-        v0 = mat([0, 1, 0]).T
-
-        # set chi for other waypoints
-        for i in xrange(0, n):
-
-            # define vectors between waypoints
-            if i == 0:
-                v1 = mat([float(self.position[1]), float(self.position[0]), 0]).T - \
-                    mat([self.W[1, i], self.W[0, i], 0]).T
-                v2 = mat([self.W[1, i + 1], self.W[0, i + 1], 0]).T - \
-                    mat([self.W[1, i], self.W[0, i], 0]).T
-
-            elif i == n - 1:
-                v1 = mat([self.W[1, i - 1], self.W[0, i - 1], 0]).T - \
-                    mat([self.W[1, i], self.W[0, i], 0]).T
-                v2 = -v1
-
-            else:
-                v1 = mat([self.W[1, i - 1], self.W[0, i - 1], 0]).T - \
-                    mat([self.W[1, i], self.W[0, i], 0]).T
-                v2 = mat([self.W[1, i + 1], self.W[0, i + 1], 0]).T - \
-                    mat([self.W[1, i], self.W[0, i], 0]).T
-
-            # normailze vectors
-            v1 = v1 / np.linalg.norm(v1)
-            v2 = v2 / np.linalg.norm(v2)
-
-            # define chi sign
-            sign = int(np.sign(v2[0] - v1[0]))
-            if sign == 0:
-                sign = 1
-
-            bisector = v1 + v2
-
-            # check if waypoints are in a straight line
-            if bisector[0] == 0 and bisector[1] == 0:
-                self.Chi_waypoint[i] = sign * self.angle(v0, v2)
-            else:
-                # define both chi options
-                opt1 = mat([float(bisector[1]), float(-bisector[0]), 0]).T
-                opt2 = mat([float(-bisector[1]), float(bisector[0]), 0]).T
-
-                # determine which option is closer to the out vector
-                opt1_dist = self.angle(opt1, v2)
-                opt2_dist = self.angle(opt2, v2)
-
-                # assign chi accordingly
-                if abs(opt1_dist) < abs(opt2_dist):
-                    self.Chi_waypoint[i] = sign * self.angle(v0, opt1)
-                else:
-                    self.Chi_waypoint[i] = sign * self.angle(v0, opt2)
+        """ build Chi_waypoint member from W and the current position """
+        self.Chi_waypoint = calc_chi_waypoint(self.W, self.position)
 
     def att_state_callback(self, msg):
         """ brings in state data from bridge node """
-        self.chi = msg.chi
-        # convert from ENU to NED
-        self.position = mat([msg.position.y, msg.position.x, -msg.position.z]).T
+        stamp = msg.header.stamp.to_sec()
+        if stamp <= 0:
+            stamp = self.clock.now()
+
+        # convert from ENU to NED straight into the preallocated state ring,
+        # guidance copies the newest state out at the start of every cycle
+        self.states.write(stamp, msg.position.y, msg.position.x, -msg.position.z, msg.chi)
+
+        # wake the event driven guidance loop
+        with self.state_cond:
+            self.state_seq = self.states.seq
+            self.state_cond.notify()
 
     def waypoint_publisher(self):
         """ executes algorithms and publishes to bridge node """
-        rate = rospy.Rate(100)
+        rate = self.clock.rate(100)
         self.output.header.frame_id = ""
 
-        while not rospy.is_shutdown():
-            self.output.header.stamp = rospy.Time.now()
-            self.output.chi_c = self.chi_c
-            self.output.h_c = self.h_c
-            self.output.Va_c = self.Va_c
-
-            # publish message
-            self.pub.publish(self.output)
-            self.crosstrack_pub.publish(self.e_crosstrack)
+        while not self.clock.is_shutdown():
+            # in event mode commands go out as soon as they are computed,
+            # only keep the stream alive when state messages stop
+            if self.guidance_mode != 'event' or self.clock.now() - self.last_publish >= 0.01:
+                self.publish_commands(self.publisher_commands, self.state_latency, self.output, self.crosstrack_out)
 
             try:  # prevent garbage in console output when thread is killed
                 rate.sleep()
             except rospy.ROSInterruptException:
                 pass
 
+    def publish_commands(self, reader, latency, output, crosstrack):
+        """ publishes one consistent snapshot of the latest commands, each
+        publishing thread passes its own commands reader, state age
+        histogram and output and crosstrack messages """
+        seq, (chi_c, h_c, Va_c, e_crosstrack, state_stamp) = reader.read()
+        now = self.clock.now()
+        output.header.stamp = rospy.Time.from_sec(now)
+        output.chi_c = chi_c
+        output.h_c = h_c
+        output.Va_c = Va_c
+        crosstrack.data = e_crosstrack
+
+        # publish message
+        self.pub.publish(output)
+        self.crosstrack_pub.publish(crosstrack)
+
+        self.last_publish = now
+        if state_stamp > 0:
+            latency.record(now - state_stamp)
+
     def run_algorithms(self):
         """ executes waypoint algorithms """
-        newpath = 1
 
-        self.wait_for_topics(10)
-        self.set_mode("OFFBOARD", 5)
-        self.set_arm(True, 5)
+        # a lockstep stand-in simulator has no FCU to arm
+        if not self.clock.lockstep:
+            self.wait_for_topics(10)
+            self.set_mode("OFFBOARD", 5)
+            self.set_arm(True, 5)
 
         # run dubins algorithm
-        while not rospy.is_shutdown():
+        if self.guidance_mode == 'event' and not self.clock.lockstep:
+            self.run_event_driven()
+        else:
+            self.run_fixed_rate()
+
+        print(self.loop_timer.report())
+        self.profile_report()
+        print(self.states.report("State messages"))
+        print(self.publisher_commands.report("Command snapshots (publisher)"))
+        if self.event_commands.reads:
+            print(self.event_commands.report("Command snapshots (event guidance)"))
+        if not self.path_follower:
+            # the node flies the compiled mission, the cache only backs a
+            # mission that does not match it
+            if self.alg.use_mission:
+                print("Dubins segments: {0} lookups from the compiled mission of {1} segments".format(
+                    self.alg.segment_timing.count, len(self.alg.mission)))
+            else:
+                print(self.alg.dubins_cache.stats())
+        if self.recorder is not None:
+            self.recorder.close()
+            print(self.recorder.report())
+
+        # dubins path parameters were exported as they were flown, render the
+        # table offline with table_dp.py
+        self.tab.close()
+        if self.tab.csv_path is not None:
+            print("Dubins parameters of {0} segments in {1}".format(self.tab.rows, self.tab.csv_path))
+
+    def run_fixed_rate(self):
+        """ runs guidance at guidance_rate on whatever state is latest, with a
+        lockstep clock the commands are published here and state messages
+        arrive while rate.sleep() advances simulated time """
+        newpath = 1
+        rate = self.clock.rate(self.guidance_rate)
+        while not self.clock.is_shutdown():
+            self.loop_timer.start()
             try:
-                if self.path_follower:
-                    flag, r, q, c, rho, lamb, i = self.set_path_follower_params(int(sys.argv[1]))
-                else:
-                    flag, r, q, c, rho, lamb, i, dp = self.alg.followWppDubins(self.W, self.Chi_waypoint, self.position, self.R, newpath)
-
-                # print out current waypoint (not completely working yet)
-                if self.current_waypoint != i:
-                    self.current_waypoint = i
-                    print("Achieved waypoint " + str(i))
-
-                    # if dubins path
-                    if dp:
-                        self.dp_list.append(dp)
-
-                # feed dubins output to straight line and orbit follower
-                self.e_crosstrack.data, chi_c, h_c = self.alg.pathFollower(flag, r, q, self.position, self.chi, self.chi_inf, self.k_path, c, rho, lamb, self.k_orbit)
-
-                # format chi interval to -pi < chi < pi
-                self.chi_c = self.format_chi(chi_c)
-                self.h_c = h_c
+                self.guidance_cycle(newpath)
+            except IndexError:
+                break
+            newpath = 0
+            self.cycle_hist.record(self.loop_timer.stop())
+            if self.clock.lockstep:
+                self.publish_commands(self.publisher_commands, self.state_latency, self.output, self.crosstrack_out)
 
-                if newpath == 1:
-                    newpath = 0
+            try:  # prevent garbage in console output when node is killed
+                rate.sleep()
+            except rospy.ROSInterruptException:
+                pass
 
+    def run_event_driven(self):
+        """ runs guidance once for every new state message and publishes the result right away """
+        newpath = 1
+        seq = self.state_seq
+        while not self.clock.is_shutdown():
+            with self.state_cond:
+                while self.state_seq == seq and not self.clock.is_shutdown():
+                    self.state_cond.wait(0.1)  # timeout so shutdown is noticed
+                seq = self.state_seq
+            if seq == 0:
+                continue
+
+            self.loop_timer.start()
+            try:
+                self.guidance_cycle(newpath)
             except IndexError:
                 break
-
-        # write dubins path parameters to a file
-        if self.dp_list:
-            self.tab.write_dp(self.dp_list)
+            newpath = 0
+            self.cycle_hist.record(self.loop_timer.stop())
+            self.publish_commands(self.event_commands, self.event_state_latency, self.event_output,
+                                  self.event_crosstrack_out)
+
+    def guidance_cycle(self, newpath):
+        """ runs the path manager and path follower once on the latest state """
+        # copy the newest state out of the ring, position is only written here
+        seq, state_stamp, self.chi = self.states.read(self.position)
+        if self.extrapolate_state and seq >= 2:
+            self.states.extrapolate(self.clock.now(), self.position)
+
+        t0 = default_timer()
+        if self.path_follower:
+            flag, r, q, c, rho, lamb, i = self.set_path_follower_params(int(sys.argv[1]))
+        else:
+            flag, r, q, c, rho, lamb, i, dp = self.alg.followWppDubins(self.W, self.Chi_waypoint, self.position, self.R, newpath)
+        self.manager_hist.record(default_timer() - t0)
+
+        # print out current waypoint (not completely working yet)
+        if self.current_waypoint != i:
+            self.current_waypoint = i
+            print("Achieved waypoint " + str(i))
+
+            # if dubins path
+            if dp:
+                self.dp_list.append(dp)
+                self.tab.append(dp)
+
+        # feed dubins output to straight line and orbit follower
+        t0 = default_timer()
+        self.e_crosstrack.data, chi_c, h_c = self.alg.pathFollowerFast(flag, r, q, self.position, self.chi, self.chi_inf, self.k_path, c, rho, lamb, self.k_orbit)
+        self.follower_hist.record(default_timer() - t0)
+
+        # format chi interval to -pi < chi < pi
+        self.chi_c = self.format_chi(chi_c)
+        self.h_c = h_c
+
+        # hand the whole command set to the publisher at once
+        self.commands.write(self.chi_c, self.h_c, self.Va_c, self.e_crosstrack.data, state_stamp)
+
+        if self.recorder is not None:
+            p = self.position
+            self.recorder.record(state_stamp, p.item(0), p.item(1), p.item(2), self.chi, self.chi_c, self.h_c,
+                                 self.e_crosstrack.data, i, self.alg.state)
+
+    def profile_report(self):
+        """ prints the guidance timing histograms and mission setup times, and
+        saves them next to the telemetry as guidance_profile.json when
+        recording """
+        # the publisher thread may still be recording, merge both threads'
+        # state ages into a copy instead of into either histogram
+        state_latency = LatencyHistogram("State age at publish")
+        state_latency.merge(self.state_latency)
+        state_latency.merge(self.event_state_latency)
+        hists = (self.cycle_hist, self.manager_hist, self.alg.segment_timing, self.follower_hist,
+                 state_latency)
+        for hist in hists:
+            print(hist.report())
+        for name in sorted(self.setup_times):
+            print("{0}: {1:.3f} ms".format(name, 1e3 * self.setup_times[name]))
+        if self.recorder is not None and self.recorder.enabled:
+            profile = dict((hist.name, hist.summary()) for hist in hists)
+            profile["mission setup"] = self.setup_times
+            try:
+                with open(os.path.join(self.recorder.directory, "guidance_profile.json"), 'w') as f:
+                    json.dump(profile, f, indent=2)
+            except (IOError, OSError) as e:
+                self.alg.diag.warn("profile", 0, "Guidance profile not saved: {0}", e)
 
     def set_path_follower_params(self, path):
         flag = path
@@ -269,23 +396,63 @@ class UAV(MavrosTestCommon):
 
     def format_chi(self, chi_c):
         """ makes sure chi is in the correct interval """
-        chi_c = float(chi_c)
-        while(chi_c > pi):
-            chi_c -= 2 * pi
-        while(chi_c < -pi):
-            chi_c += 2 * pi
-        assert (chi_c >= -pi and chi_c <= pi)
-        return chi_c
+        return format_chi(chi_c)
 
     def angle(self, v1, v2):
         """ returns the angle between two vectors """
-        return np.arctan2(np.linalg.norm(np.cross(v1.T, v2.T)), np.dot(v1.T, v2))
+        return angle(v1, v2)
+
+
+def lockstep_uav(path_follower, clock=None, vehicle=None):
+    """
+    lockstep_uav sets up a UAV for a software in the loop run without a ROS
+    master, PX4 or Gazebo: the node runs on a SimClock, its topics are a
+    SimTransport and a kinematic_sim.LockstepSim flies the commands it
+    publishes and publishes the state back, all on one thread.
+
+    Inputs:
+        path_follower = as for UAV.setUp
+        clock = SimClock, one with the default step is created by default
+        vehicle = KinematicUAV, by default it starts over home at the
+                  altitude of the first waypoint, heading north
+
+    Outputs
+        uav = UAV ready for run_algorithms, uav.transport has what it published
+    """
+    from clock import SimClock
+    from transport import SimTransport
+    from kinematic_sim import KinematicUAV, LockstepSim
+
+    if clock is None:
+        clock = SimClock()
+    if vehicle is None:
+        W = read_plan(PLAN_FILE if PLAN_FILE is not None else scripts_path(DEFAULT_PLAN))
+        vehicle = KinematicUAV([0.0, 0.0, W[2, 0]], 0.0)
+    transport = SimTransport()
+
+    def get_command():
+        # hold course, altitude and airspeed until the node publishes
+        msg = transport.last.get(COMMAND_TOPIC)
+        if msg is None:
+            return vehicle.chi, -vehicle.p.item(2), vehicle.Va
+        return msg.chi_c, msg.h_c, msg.Va_c
+
+    LockstepSim(clock, vehicle, lambda msg: transport.publish(STATE_TOPIC, msg), get_command)
+    uav = UAV()
+    uav.setUp(path_follower, clock, transport)
+    return uav
 
 
 if __name__ == '__main__':
     # set default to dubins paths
     path_follower = False
 
+    # --sim flies the kinematic stand-in simulator in lockstep instead of
+    # connecting to ROS
+    sim = '--sim' in sys.argv
+    if sim:
+        sys.argv.remove('--sim')
+
     # check input arguments
     if len(sys.argv) == 2:
         if sys.argv[1][-5:] == '.plan':
@@ -296,11 +463,14 @@ if __name__ == '__main__':
             path_follower = True
         else:
             print("Invalid input argument. Expecting valid '.plan' file or a path_follower number")
-            print("'1' for straight line and '2' for orbit")
+            print("'1' for straight line and '2' for orbit, add --sim to fly the kinematic simulator instead of ROS")
             os._exit(1)
 
     # create node and class instance
-    rospy.init_node("waypoint_node")
-    uav = UAV()
-    uav.setUp(path_follower)
+    if sim:
+        uav = lockstep_uav(path_follower)
+    else:
+        rospy.init_node("waypoint_node")
+        uav = UAV()
+        uav.setUp(path_follower)
     uav.run_algorithms()